@@ -0,0 +1,143 @@
+"""Benchmarks the solver on a set of hard puzzles.
+
+Each instance is solved once per seed and per engine configuration. We report the
+median, 90th percentile and maximum number of explored nodes and seconds so that the
+tail of the runtime distribution is visible, not just the average.
+
+Puzzles generated with generate.py can be added with --corpus; each corpus file is
+reported as one row over all of its puzzles.
+
+Install python-sat or pycosat to compare against the SAT backend ("sat" config).
+
+Usage: python benchmark.py [--seeds N] [--config NAME ...] [--instance NAME ...]
+                           [--corpus PATH ...]
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Callable
+
+from lookair import LookairState
+from main import GameEngine, State
+from sat import BACKENDS, SatEngine
+from service import PUZZLE_TYPES
+from sudoku import SudokuState
+
+SUDOKUS = {
+    "sudoku-extreme": "3....8..97..5...2...........46......2..1...3...38..4..8....7.5......6.4.67...92..",
+    "sudoku-inkala": "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    "sudoku-escargot": "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+}
+LOOKAIRS = {
+    "lookair-6x6": (
+        6,
+        {
+            (0, 0): 3,
+            (1, 0): 3,
+            (1, 3): 3,
+            (2, 5): 1,
+            (3, 1): 2,
+            (4, 1): 0,
+            (4, 3): 2,
+            (5, 1): 1,
+        },
+    ),
+}
+
+INSTANCES: dict[str, Callable[[], State]] = {
+    **{
+        name: lambda grid=grid: SudokuState.from_string(grid)
+        for name, grid in SUDOKUS.items()
+    },
+    **{
+        name: lambda size=size, numbers=numbers: LookairState(size, numbers)
+        for name, (size, numbers) in LOOKAIRS.items()
+    },
+}
+
+CONFIGS: dict[str, Callable[[State, int], GameEngine]] = {
+    "baseline": lambda state, seed: GameEngine(state, verbose=False),
+    "random": lambda state, seed: GameEngine(state, seed=seed, verbose=False),
+    "restarts": lambda state, seed: GameEngine(
+        state, seed=seed, restart_interval=1000, verbose=False
+    ),
+    "nogoods": lambda state, seed: GameEngine(
+        state, seed=seed, max_nogoods=10000, verbose=False
+    ),
+    "ordered": lambda state, seed: GameEngine(
+        state, seed=seed, value_ordering=True, verbose=False
+    ),
+    "probing": lambda state, seed: GameEngine(
+        state, seed=seed, probe_budget=32, verbose=False
+    ),
+    "adaptive-rules": lambda state, seed: GameEngine(
+        state, seed=seed, adaptive_rules=True, verbose=False
+    ),
+    "decompose": lambda state, seed: GameEngine(
+        state, seed=seed, decompose=True, verbose=False
+    ),
+}
+if BACKENDS:
+    # Nodes are the SAT solver's decisions (0 if the backend doesn't report them).
+    CONFIGS["sat"] = lambda state, seed: SatEngine(state)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def load_corpus(path: str) -> list[Callable[[], State]]:
+    with open(path) as f:
+        puzzles = [json.loads(line) for line in f]
+    return [
+        lambda puzzle=puzzle: PUZZLE_TYPES[puzzle["type"]](puzzle) for puzzle in puzzles
+    ]
+
+
+def run(make_state: Callable[[], State], config: str, seed: int) -> tuple[int, float]:
+    engine = CONFIGS[config](make_state(), seed)
+    start = time.perf_counter()
+    engine.solve()
+    return engine.nodes_explored, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--config", nargs="+", default=list(CONFIGS), choices=CONFIGS)
+    parser.add_argument(
+        "--instance", nargs="+", default=list(INSTANCES), choices=INSTANCES
+    )
+    parser.add_argument("--corpus", nargs="+", default=[])
+    args = parser.parse_args()
+
+    instances = {name: [INSTANCES[name]] for name in args.instance}
+    for path in args.corpus:
+        instances[os.path.basename(path)] = load_corpus(path)
+
+    print(
+        f"{'instance':<18}{'config':<12}"
+        f"{'nodes p50':>10}{'p90':>8}{'max':>8}{'sec p50':>10}{'p90':>8}{'max':>8}"
+    )
+    for instance, states in instances.items():
+        for config in args.config:
+            results = [
+                run(make_state, config, seed)
+                for make_state in states
+                for seed in range(args.seeds)
+            ]
+            nodes = [n for n, _ in results]
+            seconds = [s for _, s in results]
+            print(
+                f"{instance:<18}{config:<12}"
+                f"{percentile(nodes, 0.5):>10}{percentile(nodes, 0.9):>8}{max(nodes):>8}"
+                f"{percentile(seconds, 0.5):>10.2f}{percentile(seconds, 0.9):>8.2f}"
+                f"{max(seconds):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Caches sudoku solutions by canonical form.
+
+Relabelling the digits, permuting the rows within a band, the bands, the columns
+within a stack or the stacks, and transposing all turn a sudoku into an equivalent
+one. `canonicalize` picks a single representative of all these variants: the one
+whose grid, read row by row with empty cells as 0 and digits numbered in order of
+first appearance, is lexicographically smallest. It builds that grid row by row and
+only keeps the transforms that are still tied for the smallest prefix, which is
+usually few once the first rows have clues.
+
+`SolutionCache` stores solutions under that key in an LRU cache and optionally in a
+dbm file on disk, and maps a stored solution back through the inverse transform, so
+a relabelled or shuffled copy of a solved puzzle is answered without any search.
+
+Only 9x9 grids are canonicalized; other sizes (and grids too empty to canonicalize
+within `max_candidates`) are solved without the cache.
+
+Usage: python canonical.py  (prints cost measurements)
+"""
+
+import dbm
+import itertools
+import random
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from main import GameEngine
+from sudoku import SudokuState
+
+_PERMS = list(itertools.permutations(range(3)))
+# Every order of the 9 columns that keeps the stacks together.
+COLUMN_ORDERS = [
+    tuple(3 * stack + within[stack][i] for stack in stacks for i in range(3))
+    for stacks in _PERMS
+    for within in itertools.product(_PERMS, repeat=3)
+]
+
+
+class Transform(NamedTuple):
+    """Maps a grid to its canonical form: transpose it if `transpose`, then take
+    rows in the order `rows` and columns in the order `columns`, and replace each
+    digit d by `labels[d]`.
+    """
+
+    transpose: bool
+    rows: tuple[int, ...]
+    columns: tuple[int, ...]
+    labels: dict[int, int]
+
+    def apply(self, data: list[list]) -> list[list]:
+        if self.transpose:
+            data = [list(column) for column in zip(*data)]
+        labels = self._complete_labels()
+        return [
+            [None if data[r][c] is None else labels[data[r][c]] for c in self.columns]
+            for r in self.rows
+        ]
+
+    def invert(self, data: list[list]) -> list[list]:
+        inverse = {label: digit for digit, label in self._complete_labels().items()}
+        result = [[None] * 9 for _ in range(9)]
+        for i, r in enumerate(self.rows):
+            for j, c in enumerate(self.columns):
+                value = data[i][j]
+                result[r][c] = None if value is None else inverse[value]
+        if self.transpose:
+            result = [list(column) for column in zip(*result)]
+        return result
+
+    def _complete_labels(self) -> dict[int, int]:
+        # Digits missing from the puzzle are interchangeable, so any order works.
+        missing_digits = [d for d in range(1, 10) if d not in self.labels]
+        missing_labels = sorted(set(range(1, 10)) - set(self.labels.values()))
+        return {**self.labels, **dict(zip(missing_digits, missing_labels))}
+
+
+def canonicalize(
+    state: SudokuState, max_candidates: int = 100_000
+) -> Optional[tuple[str, Transform]]:
+    """Return the canonical form of `state` as an 81 character string (0 for empty
+    cells) and the transform that produces it, or None if the grid isn't 9x9 or
+    more than `max_candidates` transforms stay tied.
+    """
+    if state.size != 9:
+        return None
+    grids = {False: state.data, True: [list(column) for column in zip(*state.data)]}
+    # Each branch is (transpose, rows so far, [(columns, labels, next label)]).
+    branches = [
+        (transpose, (), [(columns, {}, 1) for columns in COLUMN_ORDERS])
+        for transpose in grids
+    ]
+    key: list[int] = []
+    for i in range(9):
+        best: Optional[list[int]] = None
+        tied: dict[tuple, list] = {}
+        for transpose, rows, candidates in branches:
+            if i % 3 == 0:
+                used_bands = {r // 3 for r in rows}
+                choices = [r for r in range(9) if r // 3 not in used_bands]
+            else:
+                band = rows[-1] // 3
+                choices = [r for r in range(3 * band, 3 * band + 3) if r not in rows]
+            for r in choices:
+                source = grids[transpose][r]
+                for columns, labels, next_label in candidates:
+                    row, new_labels, label = _relabel_row(
+                        source, columns, labels, next_label, best
+                    )
+                    if row is None:
+                        continue  # already worse than the best row
+                    if best is None or row < best:
+                        best = row
+                        tied = {}
+                    if new_labels:
+                        labels = {**labels, **new_labels}
+                    tied.setdefault((transpose, rows + (r,)), []).append(
+                        (columns, labels, label)
+                    )
+        key += best
+        branches = [(*branch, candidates) for branch, candidates in tied.items()]
+        if sum(len(candidates) for *_, candidates in branches) > max_candidates:
+            return None
+
+    transpose, rows, candidates = branches[0]
+    columns, labels, _ = candidates[0]
+    return "".join(map(str, key)), Transform(transpose, rows, columns, labels)
+
+
+def _relabel_row(
+    source: list,
+    columns: tuple[int, ...],
+    labels: dict[int, int],
+    next_label: int,
+    best: Optional[list[int]],
+) -> tuple[Optional[list[int]], dict[int, int], int]:
+    """Return `source` in the order `columns` with digits relabelled, or None as soon
+    as it is known to be larger than `best`.
+    """
+    row = []
+    new_labels = {}
+    tied = best is not None
+    for i, c in enumerate(columns):
+        value = source[c]
+        if value is None:
+            label = 0
+        else:
+            label = labels.get(value) or new_labels.get(value)
+            if label is None:
+                label = new_labels[value] = next_label
+                next_label += 1
+        if tied and label != best[i]:
+            if label > best[i]:
+                return None, new_labels, next_label
+            tied = False
+        row.append(label)
+    return row, new_labels, next_label
+
+
+class SolutionCache:
+    """An LRU cache of up to `max_size` solutions keyed by canonical form, backed by
+    the dbm file at `path` if given.
+    """
+
+    def __init__(self, max_size: int = 10_000, path: str | None = None) -> None:
+        self.max_size = max_size
+        self.memory: OrderedDict[str, str] = OrderedDict()
+        self.disk = None if path is None else dbm.open(path, "c")
+        self.hits = 0
+        self.misses = 0
+        self.canonicalize_seconds = 0.0
+
+    def solve(self, state: SudokuState) -> SudokuState:
+        start = time.perf_counter()
+        canonical = canonicalize(state)
+        self.canonicalize_seconds += time.perf_counter() - start
+        if canonical is None:
+            return GameEngine(state, verbose=False).solve()
+        key, transform = canonical
+
+        solution = self._get(key)
+        if solution is not None:
+            self.hits += 1
+            return SudokuState(transform.invert(_parse(solution)))
+
+        self.misses += 1
+        result = GameEngine(state, verbose=False).solve()
+        solution = transform.apply(result.data)
+        self._put(key, "".join(str(v) for row in solution for v in row))
+        return result
+
+    def _get(self, key: str) -> Optional[str]:
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        if self.disk is not None and key in self.disk:
+            solution = self.disk[key].decode()
+            self._put(key, solution, write_through=False)
+            return solution
+        return None
+
+    def _put(self, key: str, solution: str, write_through: bool = True) -> None:
+        self.memory[key] = solution
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+        if write_through and self.disk is not None:
+            self.disk[key] = solution
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+
+def _parse(grid: str) -> list[list]:
+    values = [None if char == "0" else int(char) for char in grid]
+    return [values[row * 9 : (row + 1) * 9] for row in range(9)]
+
+
+def random_variant(state: SudokuState, rng: random.Random) -> SudokuState:
+    """Return `state` relabelled, shuffled and maybe transposed at random."""
+    bands, stacks = rng.sample(range(3), 3), rng.sample(range(3), 3)
+    rows = [3 * band + r for band in bands for r in rng.sample(range(3), 3)]
+    columns = [3 * stack + c for stack in stacks for c in rng.sample(range(3), 3)]
+    labels = dict(zip(range(1, 10), rng.sample(range(1, 10), 9)))
+    transform = Transform(rng.random() < 0.5, tuple(rows), tuple(columns), labels)
+    return SudokuState(transform.apply(state.data))
+
+
+def main():
+    from benchmark import SUDOKUS
+
+    rng = random.Random(0)
+    print(f"{'instance':<18}{'solve ms':>10}{'canon ms p50':>14}{'max':>8}{'hit ms':>8}")
+    for name, grid in SUDOKUS.items():
+        state = SudokuState.from_string(grid)
+        start = time.perf_counter()
+        GameEngine(state, verbose=False).solve()
+        solve_ms = (time.perf_counter() - start) * 1000
+
+        cache = SolutionCache()
+        cache.solve(state)
+        canon_ms, hit_ms = [], []
+        for _ in range(20):
+            variant = random_variant(state, rng)
+            start = time.perf_counter()
+            canonicalize(variant)
+            canon_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            cache.solve(variant)
+            hit_ms.append((time.perf_counter() - start) * 1000)
+        assert cache.hits == 20
+        canon_ms.sort()
+        print(
+            f"{name:<18}{solve_ms:>10.1f}{canon_ms[10]:>14.1f}{canon_ms[-1]:>8.1f}"
+            f"{sorted(hit_ms)[10]:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Checkpointing of long-running searches.
+
+Rather than saving the search tree, a checkpoint is an append-only log of the
+engine's decisions: which move it explored at which node (identified by the moves on
+the path to it) and when it restarted. Everything else, including the states,
+forced moves, illegal moves and nogoods, follows deterministically from replaying
+these decisions, which is much cheaper than the original search since it skips
+choosing what to explore.
+
+The format is a header followed by records:
+
+    header:  b"PZCK" version:u8 len:varint engine-config(json) len:varint start-state(pickle)
+    explore: 0x01 depth:varint (row col value)*depth row col value   (all varints)
+    restart: 0x02
+
+Records are buffered and appended every `flush_every` records. A record cut short by
+a crash is ignored (and overwritten) when the checkpoint is resumed. Only games whose
+moves are `GridMove`s, and engines without `adaptive_rules`, can be checkpointed.
+
+The random number generator of a seeded engine isn't saved, and replaying doesn't
+draw from it, so a resumed search with a `seed` goes on differently from one that
+was never interrupted. It still finds every solution, but in a different order.
+
+Usage:
+    engine = GameEngine(state)
+    solution = engine.solve(checkpoint=Checkpoint("search.ckpt"))
+
+Run the same code again after a crash to resume where the search stopped.
+"""
+
+import json
+import os
+import pickle
+
+from main import GameEngine, GridMove, Move
+
+MAGIC = b"PZCK"
+VERSION = 2
+EXPLORE = 1
+RESTART = 2
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]  # raises IndexError on a truncated record
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _write_move(buffer: bytearray, move: Move) -> None:
+    if not isinstance(move, GridMove):
+        raise TypeError(f"Can't checkpoint {type(move).__name__}.")
+    _write_varint(buffer, move.row)
+    _write_varint(buffer, move.col)
+    _write_varint(buffer, move.value)
+
+
+def _read_move(data: bytes, pos: int) -> tuple[GridMove, int]:
+    row, pos = _read_varint(data, pos)
+    col, pos = _read_varint(data, pos)
+    value, pos = _read_varint(data, pos)
+    return GridMove(row, col, value), pos
+
+
+def _engine_config(engine: GameEngine) -> bytes:
+    return json.dumps(
+        {
+            "seed": engine.seed,
+            "restart_interval": engine.restart_interval,
+            "max_nogoods": None if engine.nogoods is None else engine.nogoods.max_size,
+            "probe_budget": None if engine.prober is None else engine.prober.max_budget,
+            "probe_depth": None if engine.prober is None else engine.prober.max_depth,
+            "decompose": engine.decomposer is not None,
+        },
+        sort_keys=True,
+    ).encode()
+
+
+class Checkpoint:
+    def __init__(self, path: str, flush_every: int = 100) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer = bytearray()
+        self.pending = 0
+        self.file = None
+
+    def open(self, engine: GameEngine) -> list[tuple]:
+        """Start or resume the checkpoint for `engine`'s search.
+
+        Returns the events to replay, each ("explore", path, move) or ("restart",).
+        """
+        if engine.rules is not None and engine.rules.adaptive:
+            # Its forced moves depend on timings, so replaying could take other paths.
+            raise ValueError("Searches with adaptive_rules can't be checkpointed.")
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        for part in (_engine_config(engine), pickle.dumps(engine.start_state)):
+            _write_varint(header, len(part))
+            header += part
+
+        events = []
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            if not data.startswith(bytes(header)):
+                raise ValueError(
+                    f"{self.path} is a checkpoint of a different puzzle or engine."
+                )
+            events, valid_length = self._read_events(data, len(header))
+            self.file = open(self.path, "r+b")
+            self.file.truncate(valid_length)
+            self.file.seek(valid_length)
+        else:
+            self.file = open(self.path, "wb")
+            self.file.write(header)
+            self.file.flush()
+        return events
+
+    @staticmethod
+    def _read_events(data: bytes, pos: int) -> tuple[list[tuple], int]:
+        events = []
+        while pos < len(data):
+            try:
+                tag = data[pos]
+                if tag == RESTART:
+                    events.append(("restart",))
+                    pos += 1
+                    continue
+                if tag != EXPLORE:
+                    break
+                depth, end = _read_varint(data, pos + 1)
+                path = []
+                for _ in range(depth):
+                    move, end = _read_move(data, end)
+                    path.append(move)
+                move, end = _read_move(data, end)
+            except IndexError:
+                break  # the last record was cut short
+            events.append(("explore", path, move))
+            pos = end
+        return events, pos
+
+    def record_explore(self, path: list[Move], move: Move) -> None:
+        self.buffer.append(EXPLORE)
+        _write_varint(self.buffer, len(path))
+        for path_move in path:
+            _write_move(self.buffer, path_move)
+        _write_move(self.buffer, move)
+        self._record()
+
+    def record_restart(self) -> None:
+        self.buffer.append(RESTART)
+        self._record()
+
+    def _record(self) -> None:
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.write(self.buffer)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.buffer.clear()
+        self.pending = 0
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
@@ -0,0 +1,263 @@
+"""Cube-and-conquer: splits a puzzle into sub-puzzles that can be solved separately,
+e.g. on different machines.
+
+`cube` plays the puzzle's forced moves and then branches on the most constrained
+group, playing the forced moves after each option, until the branches reach
+`--depth` decisions or there are at least `--count` of them. Options that lead to a
+dead end are dropped. Each remaining branch is written as a standalone cube file
+holding the puzzle (as a service.py request) and the decisions leading to it, so
+only puzzles whose moves are `GridMove`s can be split:
+
+    {"cube": 3, "puzzle": {"type": "sudoku", "grid": "3....8..9..."},
+     "prefix": [[0, 1, 2], [4, 4, 7]]}
+
+together with a `manifest.json` listing the cubes. `conquer` solves one cube and
+writes its result next to it (`cube-0003.result.json`), and `merge` reads the
+results: the puzzle is solved as soon as any cube is, and has no solution once every
+cube has been searched without one. The cubes between them cover every solution, so
+no other cube needs to finish once one is solved. `local` does all three on one host
+with a pool of processes, and cancels the remaining cubes after the first solution.
+
+Usage:
+    python cube.py cube PUZZLE.json (--depth N | --count N) [--out DIR]
+    python cube.py conquer CUBE.json [--max-nodes N] [--timeout SECONDS]
+    python cube.py merge DIR
+    python cube.py local PUZZLE.json --count N [--workers N] [--out DIR]
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Optional
+
+from main import GameEngine, GridMove, Move, State, play_necessary_moves
+from service import PUZZLE_TYPES
+
+
+def make_cubes(
+    state: State, depth: int | None = None, count: int | None = None
+) -> list[list[GridMove]]:
+    """Split `state` into branches, breadth first, until they all have `depth`
+    decisions or there are at least `count` of them, and return each branch's
+    decisions. Returns no branches if `state` has no solution.
+    """
+    assert depth is not None or count is not None, "Give a depth or a count."
+    state, legal_moves, _ = play_necessary_moves(state.copy())
+    if not legal_moves and not state.is_solved():
+        return []
+    open_branches = deque([([], state, legal_moves)])
+    closed_branches = []  # solved, or as deep as allowed
+    while open_branches and (
+        count is None or len(open_branches) + len(closed_branches) < count
+    ):
+        prefix, state, legal_moves = open_branches.popleft()
+        if not legal_moves or len(prefix) == depth:
+            closed_branches.append((prefix, state, legal_moves))
+            continue
+        for move in min(legal_moves, key=len):
+            new_state = state.copy()
+            move.play(new_state)
+            new_state, new_legal_moves, _ = play_necessary_moves(new_state)
+            if new_legal_moves or new_state.is_solved():
+                open_branches.append((prefix + [move], new_state, new_legal_moves))
+    return [prefix for prefix, _, _ in closed_branches + list(open_branches)]
+
+
+def write_cubes(
+    puzzle: dict[str, Any], prefixes: list[list[GridMove]], out_dir: str
+) -> list[str]:
+    """Write a cube file for each prefix of `puzzle` and the manifest, and return
+    the cube files' paths.
+    """
+    # Check every move before touching `out_dir`.
+    prefixes_json = [[_move_to_json(move) for move in prefix] for prefix in prefixes]
+    os.makedirs(out_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(out_dir, "cube-*.json")):
+        os.remove(stale)  # including results from an earlier run
+    paths = []
+    for i, prefix in enumerate(prefixes_json):
+        path = os.path.join(out_dir, f"cube-{i:04d}.json")
+        cube = {
+            "cube": i,
+            "puzzle": puzzle,
+            "prefix": prefix,
+        }
+        _write_json(path, cube)
+        paths.append(path)
+    _write_json(
+        os.path.join(out_dir, "manifest.json"),
+        {"puzzle": puzzle, "cubes": [os.path.basename(path) for path in paths]},
+    )
+    return paths
+
+
+def _move_to_json(move: Move) -> list[int]:
+    if not isinstance(move, GridMove):
+        raise TypeError(f"Can't write {type(move).__name__} to a cube file.")
+    return [move.row, move.col, move.value]
+
+
+def cube_puzzle(
+    puzzle: dict[str, Any],
+    out_dir: str,
+    depth: int | None = None,
+    count: int | None = None,
+) -> list[str]:
+    """Split `puzzle` (see `make_cubes`) and write its cubes to `out_dir`."""
+    prefixes = make_cubes(PUZZLE_TYPES[puzzle["type"]](puzzle), depth, count)
+    return write_cubes(puzzle, prefixes, out_dir)
+
+
+def cube_state(cube: dict[str, Any]) -> State:
+    """The sub-puzzle of `cube`: its puzzle with the prefix played."""
+    state = PUZZLE_TYPES[cube["puzzle"]["type"]](cube["puzzle"])
+    for row, col, value in cube["prefix"]:
+        GridMove(row, col, value).play(state)
+    return state
+
+
+def result_path(cube_path: str) -> str:
+    return cube_path.removesuffix(".json") + ".result.json"
+
+
+def conquer(
+    cube_path: str,
+    max_nodes: int | None = None,
+    timeout: float | None = None,
+    cancel=None,
+) -> dict[str, Any]:
+    """Solve the cube at `cube_path`, write the result next to it and return it.
+
+    The status is "solved", "no_solution", or why the search stopped early (see
+    `GameEngine._search`).
+    """
+    with open(cube_path) as f:
+        cube = json.load(f)
+    engine = GameEngine(cube_state(cube), verbose=False)
+    solution = next(engine.solve_iter(max_nodes, timeout, cancel), None)
+    if solution is not None:
+        status = "solved"
+    else:
+        status = engine.stop_reason or "no_solution"
+    result = {
+        "cube": cube["cube"],
+        "status": status,
+        "solution": None if solution is None else solution.data,
+        "stats": engine.stats(),
+    }
+    _write_json(result_path(cube_path), result)
+    return result
+
+
+def merge(out_dir: str) -> dict[str, Any]:
+    """Combine the results of the cubes in `out_dir`.
+
+    The status is "solved" (with the first solved cube's solution), "no_solution"
+    if every cube was searched without finding one, or "incomplete" with the cubes
+    still `missing` a result.
+    """
+    with open(os.path.join(out_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    missing = []
+    nodes = 0
+    for name in manifest["cubes"]:
+        path = result_path(os.path.join(out_dir, name))
+        if not os.path.exists(path):
+            missing.append(name)
+            continue
+        with open(path) as f:
+            result = json.load(f)
+        nodes += result["stats"]["nodes_explored"]
+        if result["status"] == "solved":
+            return {
+                "status": "solved",
+                "solution": result["solution"],
+                "cube": result["cube"],
+            }
+        if result["status"] != "no_solution":
+            missing.append(name)
+    if missing:
+        return {"status": "incomplete", "missing": missing, "nodes_explored": nodes}
+    return {"status": "no_solution", "nodes_explored": nodes}
+
+
+def solve_local(
+    puzzle: dict[str, Any],
+    out_dir: str,
+    depth: int | None = None,
+    count: int | None = None,
+    workers: int | None = None,
+) -> dict[str, Any]:
+    """Cube `puzzle`, conquer the cubes with a pool of `workers` processes and
+    merge the results, cancelling the other cubes once one is solved.
+    """
+    paths = cube_puzzle(puzzle, out_dir, depth, count)
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(workers) as pool:
+        cancel = manager.Event()
+        futures = [pool.submit(conquer, path, cancel=cancel) for path in paths]
+        for future in as_completed(futures):
+            if future.result()["status"] == "solved":
+                cancel.set()
+                for other in futures:
+                    other.cancel()
+                break
+    return merge(out_dir)
+
+
+def _write_json(path: str, data: Any) -> None:
+    # Write to a temporary file first so that `merge` never reads half a result.
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def _load_puzzle(path: str) -> dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cube_parser = commands.add_parser("cube", help="Split a puzzle into cubes.")
+    local_parser = commands.add_parser("local", help="Cube, conquer and merge here.")
+    for command_parser in (cube_parser, local_parser):
+        command_parser.add_argument("puzzle", help="A service.py request as JSON.")
+        command_parser.add_argument("--depth", type=int)
+        command_parser.add_argument("--count", type=int)
+        command_parser.add_argument("--out", default="cubes")
+    local_parser.add_argument("--workers", type=int)
+
+    conquer_parser = commands.add_parser("conquer", help="Solve one cube.")
+    conquer_parser.add_argument("cube")
+    conquer_parser.add_argument("--max-nodes", type=int)
+    conquer_parser.add_argument("--timeout", type=float)
+
+    merge_parser = commands.add_parser("merge", help="Combine the cubes' results.")
+    merge_parser.add_argument("out")
+
+    args = parser.parse_args()
+    result: Optional[dict[str, Any]] = None
+    if args.command in ("cube", "local") and args.depth is None and args.count is None:
+        parser.error("give --depth or --count")
+    if args.command == "cube":
+        paths = cube_puzzle(_load_puzzle(args.puzzle), args.out, args.depth, args.count)
+        print(f"Wrote {len(paths)} cubes to {args.out}")
+    elif args.command == "conquer":
+        result = conquer(args.cube, args.max_nodes, args.timeout)
+    elif args.command == "merge":
+        result = merge(args.out)
+    else:
+        puzzle = _load_puzzle(args.puzzle)
+        result = solve_local(puzzle, args.out, args.depth, args.count, args.workers)
+    if result is not None:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Rules for Fivecells: https://puzz.link/rules.html?fivecells
+
+from main import GameEngine
+from regions import RegionState, Shape, polyominoes
+from util import concat_str_horizontally, grid_data_to_str
+
+
+class FivecellsState(RegionState):
+    """Divide the grid, apart from the `blocked` cells, into regions of five cells.
+    A number gives how many of its cell's four sides are region borders, counting
+    the edge of the grid and blocked cells as borders.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        numbers_and_pos: dict[tuple[int, int], int],
+        blocked=(),
+    ) -> None:
+        self.numbers_and_pos = numbers_and_pos
+        super().__init__(size, polyominoes(5), blocked)
+
+    def fits(self, cells: Shape) -> bool:
+        # A number's borders are the sides it doesn't share with its own region.
+        for row, col in cells:
+            number = self.numbers_and_pos.get((row, col))
+            if number is None:
+                continue
+            inside = sum((row + dr, col + dc) in cells for dr, dc in self.DIRECTIONS)
+            if 4 - inside != number:
+                return False
+        return True
+
+    def __str__(self) -> str:
+        number_grid = [
+            [str(self.numbers_and_pos.get((row, col), " ")) for col in range(self.size)]
+            for row in range(self.size)
+        ]
+        return concat_str_horizontally(
+            grid_data_to_str(number_grid),
+            super().__str__(),
+            f"(move {self.moves_played})",
+        )
+
+
+if __name__ == "__main__":
+    rows = ["33222", "23123", "22223", "33321", "22222"]
+    test_problem = FivecellsState(
+        size=5,
+        numbers_and_pos={
+            (row, col): int(number)
+            for row, line in enumerate(rows)
+            for col, number in enumerate(line)
+        },
+    )
+
+    print(GameEngine(test_problem).solve())
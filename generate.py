@@ -0,0 +1,259 @@
+"""Generates puzzles with a unique solution, for stress tests and benchmarks.
+
+A puzzle is made by picking a random solution and then removing clues in a random
+order, keeping each removal only if the solver still finds exactly one solution.
+Difficulty is the number of nodes `GameEngine` explores to solve the puzzle:
+removals that push it above `max_nodes` are undone, and puzzles that end up below
+`min_nodes` are thrown away and retried. Everything is derived from the seed, so a
+corpus can be regenerated exactly.
+
+The corpus is written as JSON lines in the same format as service.py requests, plus
+the seed and difficulty:
+
+    {"type": "sudoku", "grid": "3....8..9...", "seed": 0, "nodes": 425}
+    {"type": "lookair", "size": 6, "numbers": [[0, 0, 3]], "seed": 0, "nodes": 97}
+
+Usage: python generate.py sudoku|lookair --count N [--size N] [--out PATH]
+"""
+
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+from lookair import LookairState
+from main import GameEngine, State
+from sat import SatEngine
+from sudoku import SudokuState
+
+
+def is_unique(
+    state: State, max_nodes: int | None = None, sat: bool = False
+) -> Optional[bool]:
+    """Whether `state` has exactly one solution, or None if the budget ran out.
+
+    With `sat`, the check uses `sat.SatEngine` (and no budget) instead, which is much
+    faster on large grids.
+    """
+    if sat:
+        return SatEngine(state).count_solutions(limit=2) == 1
+    engine = GameEngine(state, verbose=False)
+    solutions = sum(1 for _ in zip(range(2), engine.solve_iter(max_nodes=max_nodes)))
+    if solutions < 2 and engine.stop_reason is not None:
+        return None
+    return solutions == 1
+
+
+def difficulty(state: State, max_nodes: int | None = None) -> int:
+    """Nodes explored to solve `state`, giving up after `max_nodes`."""
+    engine = GameEngine(state, verbose=False)
+    engine.solve(max_nodes=max_nodes)
+    return engine.nodes_explored
+
+
+def _dig(
+    rng: random.Random,
+    clues: list,
+    make_state,
+    max_nodes: int | None,
+    check_budget: int | None,
+    sat: bool,
+) -> tuple[list, int]:
+    """Remove clues in a random order while the puzzle stays unique and no harder
+    than `max_nodes`. Returns the remaining clues and the puzzle's difficulty.
+    """
+    # Solving a puzzle that is already too hard can take very long, so stop there.
+    limit = None if max_nodes is None else max_nodes + 1
+    clues = clues[:]
+    order = clues[:]
+    rng.shuffle(order)
+    for clue in order:
+        clues.remove(clue)
+        state = make_state(clues)
+        if not is_unique(state, check_budget, sat) or (
+            max_nodes is not None and difficulty(state, limit) > max_nodes
+        ):
+            clues.append(clue)
+    return clues, difficulty(make_state(clues), limit)
+
+
+def _sudoku_solution(
+    rng: random.Random, box_size: int, sat: bool = False, attempts: int = 20
+) -> list[list[int]]:
+    """A random full grid. The boxes on the diagonal share no row or column, so each
+    gets its digits in a random order, and a seeded search (or the SAT backend, with
+    `sat`) fills in the rest. Starts that can't be completed within the budget are
+    retried.
+    """
+    size = box_size * box_size
+    for _ in range(attempts):
+        grid = [[None] * size for _ in range(size)]
+        for box in range(box_size):
+            digits = rng.sample(range(1, size + 1), size)
+            for i, digit in enumerate(digits):
+                row, col = divmod(i, box_size)
+                grid[box * box_size + row][box * box_size + col] = digit
+        state = SudokuState(grid)
+        if sat:
+            engine = SatEngine(state)
+            if engine.count_solutions(limit=1):
+                return engine.solve().data
+            continue
+        engine = GameEngine(state, seed=rng.randrange(2**32), verbose=False)
+        solution = next(engine.solve_iter(max_nodes=50 * size), None)
+        if solution is not None:
+            return solution.data
+    raise Exception(f"Couldn't complete a random grid of box size {box_size}.")
+
+
+def generate_sudoku(
+    seed: int,
+    box_size: int = 3,
+    min_nodes: int = 0,
+    max_nodes: int | None = None,
+    check_budget: int | None = None,
+    sat: bool = False,
+    attempts: int = 20,
+) -> dict[str, Any]:
+    """Generate a sudoku with a unique solution and between `min_nodes` and
+    `max_nodes` nodes of difficulty. `check_budget` caps the nodes spent checking
+    uniqueness after each removal (giving up keeps the clue); with `sat` the checks
+    use the SAT backend instead, see `is_unique`.
+    """
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        solution = _sudoku_solution(rng, box_size, sat)
+        size = len(solution)
+
+        def make_state(clues):
+            grid = [[None] * size for _ in range(size)]
+            for row, col in clues:
+                grid[row][col] = solution[row][col]
+            return SudokuState(grid)
+
+        cells = [(row, col) for row in range(size) for col in range(size)]
+        clues, nodes = _dig(rng, cells, make_state, max_nodes, check_budget, sat)
+        if nodes >= min_nodes:
+            return {
+                "type": "sudoku",
+                "grid": make_state(clues).to_string(),
+                "seed": seed,
+                "nodes": nodes,
+            }
+    raise Exception(f"No sudoku with at least {min_nodes} nodes found.")
+
+
+def _lookair_solution(rng: random.Random, size: int) -> LookairState:
+    """Shade random squares one by one, skipping any that would break a rule."""
+    state = LookairState(size, {})
+    state.data = [[LookairState.UNSHADED] * size for _ in range(size)]
+    for _ in range(size * size):
+        k = rng.randint(1, max(1, size // 3))
+        top, left = rng.randrange(size - k + 1), rng.randrange(size - k + 1)
+        region = [
+            (r, c)
+            for r in range(max(0, top - 1), min(size, top + k + 1))
+            for c in range(max(0, left - 1), min(size, left + k + 1))
+            if (top <= r < top + k) or (left <= c < left + k)  # square and its sides
+        ]
+        if any(state.data[r][c] == state.SHADED for r, c in region):
+            continue
+        for r in range(top, top + k):
+            for c in range(left, left + k):
+                state.data[r][c] = state.SHADED
+        if not state.is_legal_solution():
+            for r in range(top, top + k):
+                for c in range(left, left + k):
+                    state.data[r][c] = state.UNSHADED
+    return state
+
+
+def generate_lookair(
+    seed: int,
+    size: int = 6,
+    min_nodes: int = 0,
+    max_nodes: int | None = None,
+    check_budget: int | None = None,
+    sat: bool = False,
+    attempts: int = 20,
+) -> dict[str, Any]:
+    """Generate a lookair with a unique solution. See `generate_sudoku`."""
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        solution = _lookair_solution(rng, size)
+        numbers = {
+            (row, col): (value == solution.SHADED)
+            + solution.neighbors(row, col).count(solution.SHADED)
+            for row, col, value in solution.iter_cells()
+        }
+
+        def make_state(clues):
+            return LookairState(size, {cell: numbers[cell] for cell in clues})
+
+        if not is_unique(make_state(list(numbers)), check_budget, sat):
+            continue  # even every clue together doesn't pin down the solution
+        clues, nodes = _dig(
+            rng, list(numbers), make_state, max_nodes, check_budget, sat
+        )
+        if nodes >= min_nodes:
+            return {
+                "type": "lookair",
+                "size": size,
+                "numbers": [[r, c, numbers[(r, c)]] for r, c in sorted(clues)],
+                "seed": seed,
+                "nodes": nodes,
+            }
+    raise Exception(f"No lookair with at least {min_nodes} nodes found.")
+
+
+GENERATORS = {"sudoku": generate_sudoku, "lookair": generate_lookair}
+
+
+def _generate(args: tuple[str, int, dict[str, Any]]) -> dict[str, Any]:
+    kind, seed, options = args
+    return GENERATORS[kind](seed, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=GENERATORS)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="First puzzle's seed.")
+    parser.add_argument(
+        "--size", type=int, help="Box size for sudoku (3), grid size for lookair (6)."
+    )
+    parser.add_argument("--min-nodes", type=int, default=0)
+    parser.add_argument("--max-nodes", type=int)
+    parser.add_argument("--check-budget", type=int, help="Nodes per uniqueness check.")
+    parser.add_argument(
+        "--sat", action="store_true", help="Check uniqueness with the SAT backend."
+    )
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", help="Defaults to corpus/<kind>-<size>.jsonl.")
+    args = parser.parse_args()
+
+    size = args.size or (3 if args.kind == "sudoku" else 6)
+    options = {
+        "box_size" if args.kind == "sudoku" else "size": size,
+        "min_nodes": args.min_nodes,
+        "max_nodes": args.max_nodes,
+        "check_budget": args.check_budget,
+        "sat": args.sat,
+    }
+    out = args.out or f"corpus/{args.kind}-{size}.jsonl"
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    seeds = range(args.seed, args.seed + args.count)
+    jobs = [(args.kind, seed, options) for seed in seeds]
+    with ProcessPoolExecutor(args.workers) as pool, open(out, "w") as f:
+        # map keeps the seed order so the corpus is the same however it's split up.
+        for puzzle in pool.map(_generate, jobs):
+            f.write(json.dumps(puzzle) + "\n")
+            print(f"seed {puzzle['seed']}: {puzzle['nodes']} nodes")
+    print(f"Wrote {args.count} puzzles to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Rules for Killer sudoku: https://en.wikipedia.org/wiki/Killer_sudoku
+
+import itertools
+from functools import cache
+
+from main import GameEngine, GridMove
+from sat import CNF
+from sudoku import SudokuState, _peers
+
+# A cage is the sum of its digits and its cells, which hold no digit twice.
+Cage = tuple[int, tuple[tuple[int, int], ...]]
+
+
+@cache
+def cage_combinations(total: int, num_cells: int, max_value: int) -> list[int]:
+    """The sets of `num_cells` distinct digits from 1 to `max_value` that add up to
+    `total`, each as a bitmask with bit d set for digit d.
+    """
+    return [
+        sum(1 << digit for digit in digits)
+        for digits in itertools.combinations(range(1, max_value + 1), num_cells)
+        if sum(digits) == total
+    ]
+
+
+@cache
+def cage_table(total: int, num_cells: int, max_value: int) -> dict[int, int]:
+    """Map the digits placed so far in a cage (as a bitmask) to the digits its empty
+    cells can still take. Placed digits that fit no combination aren't in the table.
+    """
+    table: dict[int, int] = {}
+    for combination in cage_combinations(total, num_cells, max_value):
+        # Any subset of the combination can be what's placed so far.
+        placed = combination
+        while True:
+            table[placed] = table.get(placed, 0) | (combination & ~placed)
+            if placed == 0:
+                break
+            placed = (placed - 1) & combination
+    return table
+
+
+@cache
+def _cage_peers(
+    box_size: int, cages: tuple[Cage, ...]
+) -> dict[tuple[int, int], list[tuple[int, int]]]:
+    """Sudoku peers plus the other cells of each cell's cage."""
+    peers = {cell: list(cell_peers) for cell, cell_peers in _peers(box_size).items()}
+    for _, cells in cages:
+        for cell in cells:
+            peers[cell] += [
+                other for other in cells if other != cell and other not in peers[cell]
+            ]
+    return peers
+
+
+class KillerSudokuState(SudokuState):
+    """A sudoku whose `cages` (see `Cage`) must also add up to their sums.
+
+    Each cage looks up the digits its empty cells can still take in a table built
+    once per (sum, cell count), from the digits placed in it so far, so cages cost
+    about the same per move as rows, columns and boxes.
+    """
+
+    TABLES = ("cage_of", "cage_tables", "peers", "peer_sets")
+
+    def __init__(self, starting_grid, cages: tuple[Cage, ...] = ()) -> None:
+        self.cages = tuple((total, tuple(map(tuple, cells))) for total, cells in cages)
+        super().__init__(starting_grid)
+
+    def _build_tables(self) -> None:
+        self.cage_of = {
+            cell: index
+            for index, (_, cells) in enumerate(self.cages)
+            for cell in cells
+        }
+        self.cage_tables = [
+            cage_table(total, len(cells), self.size) for total, cells in self.cages
+        ]
+        self.peers = _cage_peers(self._box_size, self.cages)
+        self.peer_sets = {cell: frozenset(peers) for cell, peers in self.peers.items()}
+
+    def copy(self):
+        copy_state = KillerSudokuState.__new__(KillerSudokuState)
+        copy_state.__dict__.update(self.__dict__)
+        copy_state.data = [row[:] for row in self.data]
+        return copy_state
+
+    def _generate_plausible_moves_for_cell(self, row: int, col: int) -> list[GridMove]:
+        moves = super()._generate_plausible_moves_for_cell(row, col)
+        index = self.cage_of.get((row, col))
+        if index is None:
+            return moves
+        placed = 0
+        for r, c in self.cages[index][1]:
+            if self.data[r][c] is not None:
+                placed |= 1 << self.data[r][c]
+        allowed = self.cage_tables[index].get(placed, 0)
+        return [move for move in moves if allowed >> move.value & 1]
+
+    def to_cnf(self) -> CNF:
+        cnf = super().to_cnf()
+        values = range(1, self.size + 1)
+        for total, cells in self.cages:
+            x = {
+                (cell, value): cnf.var(GridMove(*cell, value))
+                for cell in cells
+                for value in values
+            }
+            for value in values:
+                cnf.at_most_one([x[(cell, value)] for cell in cells])
+            # The cage holds one of its combinations: all of that combination's
+            # digits, which fills it since no digit repeats.
+            choices = []
+            for combination in cage_combinations(total, len(cells), self.size):
+                choice = cnf.var()
+                choices.append(choice)
+                for value in values:
+                    if combination >> value & 1:
+                        cnf.add([-choice] + [x[(cell, value)] for cell in cells])
+            cnf.exactly_one(choices)
+        return cnf
+
+
+if __name__ == "__main__":
+    # https://en.wikipedia.org/wiki/Killer_sudoku#/media/File:Killersudoku_color.svg
+    killer_state = KillerSudokuState(
+        [[None] * 9 for _ in range(9)],
+        cages=(
+            (3, ((0, 0), (0, 1))),
+            (15, ((0, 2), (0, 3), (0, 4))),
+            (22, ((0, 5), (1, 4), (1, 5), (2, 4))),
+            (4, ((0, 6), (1, 6))),
+            (16, ((0, 7), (1, 7))),
+            (15, ((0, 8), (1, 8), (2, 8), (3, 8))),
+            (25, ((1, 0), (1, 1), (2, 0), (2, 1))),
+            (17, ((1, 2), (1, 3))),
+            (9, ((2, 2), (2, 3), (3, 3))),
+            (8, ((2, 5), (3, 5), (4, 5))),
+            (20, ((2, 6), (2, 7), (3, 6))),
+            (6, ((3, 0), (4, 0))),
+            (14, ((3, 1), (3, 2))),
+            (17, ((3, 4), (4, 4), (5, 4))),
+            (17, ((3, 7), (4, 6), (4, 7))),
+            (13, ((4, 1), (4, 2), (5, 1))),
+            (20, ((4, 3), (5, 3), (6, 3))),
+            (12, ((4, 8), (5, 8))),
+            (27, ((5, 0), (6, 0), (7, 0), (8, 0))),
+            (6, ((5, 2), (6, 1), (6, 2))),
+            (20, ((5, 5), (6, 5), (6, 6))),
+            (6, ((5, 6), (5, 7))),
+            (10, ((6, 4), (7, 3), (7, 4), (8, 3))),
+            (14, ((6, 7), (6, 8), (7, 7), (7, 8))),
+            (8, ((7, 1), (8, 1))),
+            (16, ((7, 2), (8, 2))),
+            (15, ((7, 5), (7, 6))),
+            (13, ((8, 4), (8, 5), (8, 6))),
+            (17, ((8, 7), (8, 8))),
+        ),
+    )
+    print(GameEngine(killer_state).solve())
@@ -0,0 +1,109 @@
+"""Generates load against a running solver service (see service.py).
+
+Opens `--clients` connections that each keep `--window` requests in flight until
+`--requests` requests have been answered in total, then prints the throughput, the
+client-side latency percentiles and the service's own stats.
+
+Usage: python loadgen.py [--socket PATH | --port PORT] [--clients N] [--requests N]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from benchmark import LOOKAIRS, SUDOKUS
+
+EASY_SUDOKU = (
+    "..9218...17..968...4..5...6451.6.37......5..99.237.5..6..5.1.......49257.948...13"
+)
+
+
+def make_requests(include_hard: bool) -> list[dict]:
+    requests = [{"type": "sudoku", "grid": EASY_SUDOKU}]
+    requests += [
+        {
+            "type": "lookair",
+            "size": size,
+            "numbers": [[row, col, n] for (row, col), n in numbers.items()],
+        }
+        for size, numbers in LOOKAIRS.values()
+    ]
+    if include_hard:
+        requests += [{"type": "sudoku", "grid": grid} for grid in SUDOKUS.values()]
+    return requests
+
+
+async def open_connection(args: argparse.Namespace):
+    if args.port is not None:
+        return await asyncio.open_connection("127.0.0.1", args.port)
+    return await asyncio.open_unix_connection(args.socket)
+
+
+async def client(
+    args: argparse.Namespace, request_ids, requests: list[dict], latencies: list
+):
+    reader, writer = await open_connection(args)
+    sent_at = {}
+
+    async def send_next() -> bool:
+        request_id = next(request_ids)
+        if request_id >= args.requests:
+            return False
+        sent_at[request_id] = time.monotonic()
+        request = {"id": request_id, **requests[request_id % len(requests)]}
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        return True
+
+    for _ in range(args.window):
+        if not await send_next():
+            break
+    while sent_at:
+        response = json.loads(await reader.readline())
+        latencies.append(time.monotonic() - sent_at.pop(response["id"]))
+        if "error" in response:
+            print("Error:", response["error"])
+        await send_next()
+    writer.close()
+
+
+async def run(args: argparse.Namespace):
+    requests = make_requests(args.hard)
+    request_ids = itertools.count()
+    latencies = []
+    start = time.monotonic()
+    await asyncio.gather(
+        *(client(args, request_ids, requests, latencies) for _ in range(args.clients))
+    )
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} requests/s")
+    for fraction in (0.5, 0.9, 0.99):
+        latency = latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+        print(f"p{round(fraction * 100)}: {latency * 1000:.1f}ms")
+
+    reader, writer = await open_connection(args)
+    writer.write(b'{"type": "stats"}\n')
+    print("service stats:", json.loads(await reader.readline()))
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default="/tmp/puzzle_solver.sock")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--window", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--hard", action="store_true", help="Also send the hard benchmark sudokus."
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
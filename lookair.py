@@ -1,7 +1,8 @@
 # Rules for Lookair: https://puzz.link/rules.html?lookair
 
 from typing import Iterable, Optional, Self
-from main import Move, ShadedGridState, GameEngine, GridMove
+from main import Move, ShadedGridState, GameEngine, GridMove, Rule
+from sat import CNF
 from util import concat_str_horizontally, grid_data_to_str
 
 
@@ -11,6 +12,7 @@ class LookairState(ShadedGridState):
     ) -> None:
         super().__init__(size=size, starting_state=data)
         self.numbers_and_pos = numbers_and_pos
+        self._clues_by_cell: dict[tuple[int, int], list[tuple[int, int]]] | None = None
 
     def __str__(self) -> str:
         shaded_grid = super().__str__()
@@ -29,34 +31,151 @@ class LookairState(ShadedGridState):
             data=[row[:] for row in self.data],
         )
         copy_state.moves_played = self.moves_played
+        copy_state._clues_by_cell = self._clues_by_cell
+        copy_state.rules = self.rules
+        copy_state.focus = self.focus
         return copy_state
 
     def generate_legal_moves(self) -> list[list[Move[Self]]]:
         moves = self._generate_moves()
         if moves == []:
             return []
-        if self.moves_played != self.size * self.size - 1:
+        if not self._one_cell_left():
             return moves
 
         # Otherwise, it's the last move, we must ensure legality
         assert len(moves) == 1, "There should only be one cell left to fill."
+        legal_moves = []
         for move in moves[0]:
             potential_end_state = self.copy()
             move.play(potential_end_state)
             if potential_end_state.is_legal_solution():
-                return [[move]]
-        return []
+                legal_moves.append(move)
+        return [legal_moves] if legal_moves else []
+
+    def is_legal(self, move: GridMove) -> bool:
+        if self.data[move.row][move.col] is not None:
+            return False
+        if not self._one_cell_left():
+            return True
+        end_state = self.copy()  # the last move must complete a legal solution
+        move.play(end_state)
+        return end_state.is_legal_solution()
+
+    def _one_cell_left(self) -> bool:
+        if self.focus is None:
+            return self.moves_played == self.size * self.size - 1
+        return sum(self.data[row][col] is None for row, col in self.focus) == 1
+
+    def order_moves(
+        self, moves: list[GridMove], legal_moves: list[list[GridMove]]
+    ) -> list[GridMove]:
+        """Shade first if the clues that see the cell still need most of their
+        undecided cells shaded, otherwise leave it unshaded first.
+        """
+        if self._clues_by_cell is None:
+            self._clues_by_cell = {}
+            for row, col in self.numbers_and_pos:
+                for cell in [(row, col), *self.neighbors_pos(row, col)]:
+                    self._clues_by_cell.setdefault(cell, []).append((row, col))
+
+        pressure = 0.0
+        for row, col in self._clues_by_cell.get((moves[0].row, moves[0].col), []):
+            cells = self.neighbors(row, col) + [self.data[row][col]]
+            undecided = sum(v is None for v in cells)
+            shaded = sum(v == self.SHADED for v in cells)
+            pressure += (self.numbers_and_pos[(row, col)] - shaded) / undecided - 0.5
+        first = self.SHADED if pressure > 0 else self.UNSHADED
+        return sorted(moves, key=lambda move: move.value != first)
+
+    def to_cnf(self) -> CNF:
+        """Encode the rules checked by `is_legal_solution`.
+
+        A variable per cell says whether it is shaded and a variable per possible
+        square says whether exactly that square is a shaded region.
+        """
+        cnf = CNF()
+        shaded = {
+            (row, col): cnf.var(
+                GridMove(row, col, self.SHADED), GridMove(row, col, self.UNSHADED)
+            )
+            for row in range(self.size)
+            for col in range(self.size)
+        }
+        for row, col, value in self.iter_cells():
+            if value is not None:
+                var = shaded[(row, col)]
+                cnf.add([var if value == self.SHADED else -var])
+
+        for (row, col), number in self.numbers_and_pos.items():
+            cells = [(row, col), *self.neighbors_pos(row, col)]
+            cnf.exactly(number, [shaded[cell] for cell in cells])
+
+        # A square region is fully shaded and surrounded by unshaded cells.
+        squares = {}
+        covering = {cell: [] for cell in shaded}
+        for k in range(1, self.size + 1):
+            for top in range(self.size - k + 1):
+                for left in range(self.size - k + 1):
+                    square = cnf.var()
+                    squares[(top, left, k)] = square
+                    for r in range(top, top + k):
+                        for c in range(left, left + k):
+                            cnf.add([-square, shaded[(r, c)]])
+                            covering[(r, c)].append(square)
+                    border = [(top - 1, c) for c in range(left, left + k)]
+                    border += [(top + k, c) for c in range(left, left + k)]
+                    border += [(r, left - 1) for r in range(top, top + k)]
+                    border += [(r, left + k) for r in range(top, top + k)]
+                    for cell in border:
+                        if cell in shaded:
+                            cnf.add([-square, -shaded[cell]])
+        for cell, var in shaded.items():
+            cnf.add([-var, *covering[cell]])
+
+        # Two squares of the same size in the same rows (or columns) need a shaded
+        # cell between them.
+        for (top, left, k), square in squares.items():
+            for other_left in range(left + k + 1, self.size - k + 1):
+                between = [
+                    shaded[(r, c)]
+                    for r in range(top, top + k)
+                    for c in range(left + k, other_left)
+                ]
+                cnf.add([-square, -squares[(top, other_left, k)], *between])
+            for other_top in range(top + k + 1, self.size - k + 1):
+                between = [
+                    shaded[(r, c)]
+                    for r in range(top + k, other_top)
+                    for c in range(left, left + k)
+                ]
+                cnf.add([-square, -squares[(other_top, left, k)], *between])
+        return cnf
 
     def is_legal_solution(self) -> bool:
+        """Whether the grid follows every rule. When solving a part (see `split`),
+        the rules involving other parts' undecided cells are left to those parts.
+        """
+        # Shaded areas next to undecided cells can still grow.
+        growing = set()
+        if self.focus is not None:
+            for row, col, value in self.iter_cells():
+                if value == self.SHADED and (row, col) not in growing:
+                    area, undecided = self._shaded_area(row, col)
+                    if undecided:
+                        growing.update(area)
+
         # Check numbers rule
         for (row, col), number in self.numbers_and_pos.items():
             neighbors = self.neighbors(row, col) + [self.data[row][col]]
+            if None in neighbors:
+                continue
             shaded_count = sum(v == self.SHADED for v in neighbors)
             if shaded_count != number:
                 return False
 
         # Check all squares
-        checked = set()
+        checked = set(growing)
         for row, col, value in self.iter_cells():
             if value != self.SHADED or (row, col) in checked:
                 continue
@@ -71,7 +190,9 @@ class LookairState(ShadedGridState):
                 checked.add((r, c))
 
         # Check line of sight rule
-        squares = self._find_rect()
+        squares = [
+            square for square in self._find_rect() if square[:2] not in growing
+        ]
         squares_by_size = {s: [] for s in range(1, self.size + 1)}
 
         for top, left, bottom, right in squares:
@@ -96,7 +217,7 @@ class LookairState(ShadedGridState):
                     for _, _, val in self._iter_rect(
                         first[0], first[3] + 1, first[2], second[1] - 1
                     ):
-                        if val == self.SHADED:
+                        if val != self.UNSHADED:
                             break
                     else:
                         return False
@@ -111,31 +232,32 @@ class LookairState(ShadedGridState):
                     for _, _, val in self._iter_rect(
                         first[2] + 1, first[1], second[0] - 1, first[3]
                     ):
-                        if val == self.SHADED:
+                        if val != self.UNSHADED:
                             break
                     else:
                         return False
         return True
 
     def _generate_moves(self) -> list[list[GridMove[Self]]]:
-        forced_moves = self.find_forced_fill_rect_moves()
-        if forced_moves is not None:
-            return forced_moves
-        forced_moves = self.find_forced_rect_to_square_moves()
-        if forced_moves is not None:
-            return forced_moves
-        forced_moves = self.find_forced_numbers()
+        forced_moves = self.find_forced_moves()
+        if forced_moves and self.focus is not None:
+            # Other parts' forced moves are theirs to play.
+            forced_moves = [
+                moves
+                for moves in forced_moves
+                if (moves[0].row, moves[0].col) in self.focus
+            ] or None
         if forced_moves is not None:
             return forced_moves
 
         return [
             [GridMove(row, col, value) for value in (self.SHADED, self.UNSHADED)]
-            for row, col, cell_value in self.iter_cells()
-            if cell_value is None
+            for row, col in self.undecided_cells()
         ]
 
     def find_forced_fill_rect_moves(self) -> list[list[GridMove]] | None:
         cells_checked = set()
+        forced_moves = {}
         for row, col, value in self.iter_cells():
             if (row, col) in cells_checked or value != self.SHADED:
                 continue
@@ -145,14 +267,16 @@ class LookairState(ShadedGridState):
                 if val == self.UNSHADED:
                     return []  # illegal state
                 elif val is None:
-                    return [[GridMove(r, c, self.SHADED)]]  # forced move
+                    forced_moves[(r, c)] = [GridMove(r, c, self.SHADED)]
                 elif val == self.SHADED:
                     cells_checked.add((r, c))
                 else:
                     raise ValueError("Unexpected cell value")
+        return list(forced_moves.values()) or None
 
     def find_forced_rect_to_square_moves(self) -> list[list[GridMove]] | None:
         rectangles = self._find_rect()
+        forced_moves = {}
 
         for row, col, end_row, end_col in rectangles:
             height = end_row - row + 1
@@ -160,35 +284,50 @@ class LookairState(ShadedGridState):
             if height == width:
                 continue  # already a square
             if height < width:
-                can_fill_top_row = row > 0 and all(
-                    self.data[row - 1][c] is None for c in range(col, end_col + 1)
-                )
-                can_fill_bottom_row = end_row + 1 < self.size and all(
-                    self.data[end_row + 1][c] is None for c in range(col, end_col + 1)
+                top_row = [(row - 1, c) for c in range(col, end_col + 1)]
+                bottom_row = [(end_row + 1, c) for c in range(col, end_col + 1)]
+                can_fill_top_row = row > 0 and self._can_shade(top_row)
+                can_fill_bottom_row = end_row + 1 < self.size and self._can_shade(
+                    bottom_row
                 )
 
                 if not can_fill_top_row and not can_fill_bottom_row:
                     return []  # illegal state
                 if can_fill_top_row and not can_fill_bottom_row:
-                    return [[GridMove(row - 1, col, self.SHADED)]]
+                    self._shade_undecided(top_row, forced_moves)
                 if not can_fill_top_row and can_fill_bottom_row:
-                    return [[GridMove(end_row + 1, col, self.SHADED)]]
+                    self._shade_undecided(bottom_row, forced_moves)
             if width < height:
-                can_fill_left_col = col > 0 and all(
-                    self.data[r][col - 1] is None for r in range(row, end_row + 1)
-                )
-                can_fill_right_col = end_col + 1 < self.size and all(
-                    self.data[r][end_col + 1] is None for r in range(row, end_row + 1)
+                left_col = [(r, col - 1) for r in range(row, end_row + 1)]
+                right_col = [(r, end_col + 1) for r in range(row, end_row + 1)]
+                can_fill_left_col = col > 0 and self._can_shade(left_col)
+                can_fill_right_col = end_col + 1 < self.size and self._can_shade(
+                    right_col
                 )
 
                 if not can_fill_left_col and not can_fill_right_col:
                     return []  # illegal state
                 if can_fill_left_col and not can_fill_right_col:
-                    return [[GridMove(row, col - 1, self.SHADED)]]
+                    self._shade_undecided(left_col, forced_moves)
                 if not can_fill_left_col and can_fill_right_col:
-                    return [[GridMove(row, end_col + 1, self.SHADED)]]
+                    self._shade_undecided(right_col, forced_moves)
+        return list(forced_moves.values()) or None
+
+    def _can_shade(self, cells: list[tuple[int, int]]) -> bool:
+        # Cells that are already shaded don't prevent the rectangle from growing.
+        return all(self.data[r][c] != self.UNSHADED for r, c in cells)
+
+    def _shade_undecided(
+        self,
+        cells: list[tuple[int, int]],
+        forced_moves: dict[tuple[int, int], list[GridMove]],
+    ) -> None:
+        for r, c in cells:
+            if self.data[r][c] is None:
+                forced_moves[(r, c)] = [GridMove(r, c, self.SHADED)]
 
     def find_forced_numbers(self) -> list[list[GridMove]] | None:
+        forced_moves = {}
         for (row, col), number in self.numbers_and_pos.items():
             neighbors = self.neighbors(row, col, with_pos=True) + [
                 (row, col, self.data[row][col])
@@ -198,14 +337,31 @@ class LookairState(ShadedGridState):
             if not (min_shaded <= number <= max_shaded):
                 return []  # illegal state
 
-            if min_shaded == number and max_shaded > number:
-                must_not_shade = [n for n in neighbors if n[2] is None][0]
-                return [[GridMove(must_not_shade[0], must_not_shade[1], self.UNSHADED)]]
-            if max_shaded == number and min_shaded < number:
-                must_shade = [n for n in neighbors if n[2] is None][0]
-                return [[GridMove(must_shade[0], must_shade[1], self.SHADED)]]
+            if min_shaded == max_shaded:
+                continue
+            if min_shaded == number:
+                value = self.UNSHADED
+            elif max_shaded == number:
+                value = self.SHADED
+            else:
+                continue
+            for r, c, v in neighbors:
+                if v is not None:
+                    continue
+                move = GridMove(r, c, value)
+                if forced_moves.setdefault((r, c), [move]) != [move]:
+                    return []  # illegal state: two clues disagree
+
+        return list(forced_moves.values()) or None
 
-        return None
+    RULES = [
+        Rule("fill_rect", find_forced_fill_rect_moves),
+        # Only finds the rectangles correctly once every shaded area is a rectangle.
+        Rule(
+            "rect_to_square", find_forced_rect_to_square_moves, requires=("fill_rect",)
+        ),
+        Rule("numbers", find_forced_numbers),
+    ]
 
     def _find_rect(self) -> list[tuple[int, int, int, int]]:
         rect = []
@@ -253,6 +409,75 @@ class LookairState(ShadedGridState):
             left - 1 <= col <= right + 1 and top <= row <= bottom
         )
 
+    def _shaded_area(
+        self, row: int, col: int
+    ) -> tuple[set[tuple[int, int]], set[tuple[int, int]]]:
+        """The shaded cells connected to (row, col) and the undecided cells next to
+        them.
+        """
+        area = {(row, col)}
+        undecided = set()
+        unexplored = [(row, col)]
+        while unexplored:
+            r, c = unexplored.pop()
+            for nr, nc, value in self.neighbors(r, c, with_pos=True):
+                if value == self.SHADED and (nr, nc) not in area:
+                    area.add((nr, nc))
+                    unexplored.append((nr, nc))
+                elif value is None:
+                    undecided.add((nr, nc))
+        return area, undecided
+
+    def constraint_scopes(self) -> Optional[list[list[tuple[int, int]]]]:
+        # A number connects the cells it counts, and a shaded area the undecided
+        # cells around it, which decide its shape. Two squares of the same size can
+        # see each other along a row or column through unshaded cells, so each
+        # undecided cell or growing shaded area is connected to the first cell that
+        # isn't unshaded in each direction (or to that cell's shaded area).
+        # Neighboring undecided cells are connected that way, so there's nothing to
+        # split while they form a single area, which is usually the case.
+        undecided = list(self.undecided_cells())
+        if not undecided or len(self._undecided_area(*undecided[0])) == len(undecided):
+            return None
+        scopes = [
+            [(row, col), *self.neighbors_pos(row, col)]
+            for row, col in self.numbers_and_pos
+        ]
+        around: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        for row, col, value in self.iter_cells():
+            if value == self.SHADED and (row, col) not in around:
+                area, undecided = self._shaded_area(row, col)
+                scopes.append(list(undecided))
+                for cell in area:
+                    around[cell] = scopes[-1]
+        for row, col, value in self.iter_cells():
+            if value is None:
+                cells = [(row, col)]
+            elif value == self.SHADED and around[(row, col)]:
+                cells = around[(row, col)]
+            else:
+                continue
+            for direction in self.DIRECTIONS:
+                for r, c, v in self._follow_dir(row, col, direction):
+                    if v is None:
+                        scopes.append([*cells, (r, c)])
+                        break
+                    if v == self.SHADED:
+                        scopes.append([*cells, *around[(r, c)]])
+                        break
+        return scopes
+
+    def _undecided_area(self, row: int, col: int) -> set[tuple[int, int]]:
+        area = {(row, col)}
+        unexplored = [(row, col)]
+        while unexplored:
+            r, c = unexplored.pop()
+            for nr, nc, value in self.neighbors(r, c, with_pos=True):
+                if value is None and (nr, nc) not in area:
+                    area.add((nr, nc))
+                    unexplored.append((nr, nc))
+        return area
+
     def _get_rect_extent(self, start_row, start_col) -> tuple[int, int]:
         explored = set()
         unexplored = [(start_row, start_col)]
@@ -1,10 +1,31 @@
+import asyncio
+import random
+import time
 from abc import ABC, abstractmethod
-from typing import Self, Generic, TypeVar, Iterable, Sequence, Optional
-
-from util import grid_data_to_str
+from itertools import chain, islice, product
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Self,
+    Sequence,
+    TypeVar,
+)
+
+from util import grid_data_to_str, luby
 
 
 class State(ABC):
+    # Games whose forced moves come from several inference rules can list them here
+    # and call `find_forced_moves`. The engine sets `rules` to a `RuleSchedule` that
+    # runs them, which copies of the state must share.
+    RULES: list["Rule"] = []
+    rules: Optional["RuleSchedule"] = None
+
     def __init__(self, data, moves_played=0):
         self.data = data
         self.moves_played = moves_played
@@ -20,7 +41,9 @@ class State(ABC):
     def generate_legal_moves(self) -> list[list["Move"]]:
         """Generate all legal moves from the current state grouped by cell.
 
-        If a cell has only one legal move, return only that cell.
+        If a cell has only one legal move, return only that cell. States may return
+        several such forced cells at once (which saves scanning the state again after
+        each one) if they implement `is_legal`.
         Any move can be considered legal as long as it is not the last move (only legal end states should be outputted).
         However, the more moves that can be ruled illegal, the faster the solver will run.
         """
@@ -28,13 +51,83 @@ class State(ABC):
     @abstractmethod
     def is_solved(self) -> bool: ...
 
+    def is_legal(self, move: "Move") -> bool:
+        """Whether `move`, forced when `generate_legal_moves` last ran, can still be
+        played after the other forced moves returned with it. Only needs to check
+        what those moves could have changed.
+        """
+        raise NotImplementedError()
+
+    def generate_forced_moves(
+        self, played: list["Move"]
+    ) -> Optional[list[list["Move"]]]:
+        """Return the forced moves (as groups of one) among the parts of the state
+        that `played` moves affected, or a single empty group for a dead end. Return
+        None (or no forced moves) to have `generate_legal_moves` scan the whole state.
+        """
+        return None
+
+    def find_forced_moves(self) -> Optional[list[list["Move"]]]:
+        """Run `RULES` in order until one finds something (see `Rule`), through the
+        `rules` schedule if there is one.
+        """
+        if self.rules is not None:
+            return self.rules.run(self)
+        for rule in self.RULES:
+            moves = rule.find(self)
+            if moves is not None:
+                return moves
+        return None
+
+    def explain(self, move: "Move") -> Optional[list["Move"]]:
+        """Return the moves played so far that rule out every other move in `move`'s
+        group, or None if unknown. Only used to learn nogoods.
+        """
+        return None
+
+    def explain_dead_end(self) -> Optional[list["Move"]]:
+        """Return the moves played so far that make this state a dead end, or None if
+        unknown. Only used to learn nogoods.
+        """
+        return None
+
+    def order_moves(
+        self, moves: list["Move"], legal_moves: list[list["Move"]]
+    ) -> Optional[list["Move"]]:
+        """Return `moves`, the unexplored options of one group, most promising first,
+        or None for no preference. `legal_moves` are this state's groups of moves.
+        """
+        return None
+
+    def key(self):
+        """Return a hashable snapshot of the state, used to cache probe results."""
+        raise NotImplementedError()
+
+    def to_cnf(self):
+        """Encode the rules and the moves played so far as a `sat.CNF`, for games
+        that can be solved with `sat.SatEngine`.
+        """
+        raise NotImplementedError()
+
+    def split(self) -> Optional[list[Self]]:
+        """Return the independent parts of the state, or None if it doesn't split.
+
+        Each part is a copy of the state that only decides some of what is still
+        undecided, and no rule connects what different parts decide, so the state's
+        solutions are exactly the combinations of the parts' solutions (see `merge`).
+        """
+        return None
+
+    def merge(self, parts: list[Self]) -> Self:
+        """Combine solutions of the parts returned by `split` into a solution."""
+        raise NotImplementedError()
+
 
 S = TypeVar("S", bound=State)
 
 
 class Move(ABC, Generic[S]):
-    def __init__(self):
-        self.is_legal = True
+    __slots__ = ()
 
     @abstractmethod
     def _play(self, state: S) -> None: ...
@@ -43,16 +136,24 @@ class Move(ABC, Generic[S]):
         self._play(state)
         state.moves_played += 1
 
+    def is_played(self, state: S) -> bool:
+        """Whether `state` already contains this move. Only used to apply nogoods."""
+        return False
+
 
 class ComboMove(Move[S]):
+    __slots__ = ("moves",)
+
     def __init__(self, moves: list[Move[S]]):
-        super().__init__()
         self.moves = moves
 
     def _play(self, state: S) -> None:
         for move in self.moves:
             move.play(state)
 
+    def is_played(self, state: S) -> bool:
+        return all(move.is_played(state) for move in self.moves)
+
 
 class GridState(State, Generic[S]):
     UP = (-1, 0)
@@ -60,6 +161,8 @@ class GridState(State, Generic[S]):
     LEFT = (0, -1)
     RIGHT = (0, 1)
     DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+    # The cells a part returned by `split` decides; None decides every cell.
+    focus: Optional[frozenset[tuple[int, int]]] = None
 
     def __init__(
         self, size: int, max_value, box_size=None, moves_played=0, starting_state=None
@@ -74,6 +177,8 @@ class GridState(State, Generic[S]):
         super().__init__(data=starting_state, moves_played=moves_played)
 
     def is_solved(self) -> bool:
+        if self.focus is not None:
+            return all(self.data[row][col] is not None for row, col in self.focus)
         return not any(None in row for row in self.data)
 
     def iter_cells(self) -> Iterable[tuple[int, int, Optional[int]]]:
@@ -81,6 +186,57 @@ class GridState(State, Generic[S]):
             for col in range(self.size):
                 yield row, col, self.data[row][col]
 
+    def undecided_cells(self) -> Iterable[tuple[int, int]]:
+        """The empty cells that this state decides (see `focus`)."""
+        for row, col, value in self.iter_cells():
+            if value is None and (self.focus is None or (row, col) in self.focus):
+                yield row, col
+
+    def constraint_scopes(self) -> Optional[Iterable[Iterable[tuple[int, int]]]]:
+        """Return groups of cells such that undecided cells that aren't connected
+        through the groups (decided cells don't connect them) can be decided
+        independently, or None if the grid never splits.
+        """
+        return None
+
+    def split(self) -> Optional[list[Self]]:
+        scopes = self.constraint_scopes()
+        if scopes is None:
+            return None
+        # Union-find over the undecided cells.
+        parent = {cell: cell for cell in self.undecided_cells()}
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        for scope in scopes:
+            roots = {find(cell) for cell in scope if cell in parent}
+            first = roots.pop() if roots else None
+            for other in roots:
+                parent[other] = first
+        components: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        for cell in parent:
+            components.setdefault(find(cell), []).append(cell)
+        if len(components) < 2:
+            return None
+        parts = []
+        for cells in sorted(components.values(), key=len):
+            part = self.copy()
+            part.focus = frozenset(cells)
+            parts.append(part)
+        return parts
+
+    def merge(self, parts: list[Self]) -> Self:
+        merged = self.copy()
+        for part in parts:
+            for row, col in part.focus:
+                merged.data[row][col] = part.data[row][col]
+            merged.moves_played += part.moves_played - self.moves_played
+        return merged
+
     def column(self, col_idx: int) -> Sequence:
         return [self.data[row_idx][col_idx] for row_idx in range(self.size)]
 
@@ -126,14 +282,24 @@ class GridState(State, Generic[S]):
 
     def generate_legal_moves(self) -> list[list[Move[S]]]:
         all_legal_moves = []
-        for row, col, value in self.iter_cells():
-            if value is not None:
-                continue
+        forced_moves = []
+        for row, col in self.undecided_cells():
             legal_moves = self._generate_plausible_moves_for_cell(row, col)
+            if not legal_moves:
+                return [legal_moves]  # dead end
             if len(legal_moves) == 1:
-                return [legal_moves]
-            all_legal_moves.append(legal_moves)
-        return all_legal_moves
+                forced_moves.append(legal_moves)
+            elif not forced_moves:
+                all_legal_moves.append(legal_moves)
+        return forced_moves or all_legal_moves
+
+    def key(self):
+        return tuple(map(tuple, self.data))
+
+    def is_legal(self, move: Move[S]) -> bool:
+        return self.data[move.row][move.col] is None and (
+            move in self._generate_plausible_moves_for_cell(move.row, move.col)
+        )
 
     def _generate_plausible_moves_for_cell(self, row: int, col: int) -> list[Move[S]]:
         raise NotImplementedError()
@@ -161,49 +327,396 @@ class ShadedGridState(GridState):
 
 
 class GridMove(Move[GridState[S]]):
-    def __init__(self, row: int, col: int, value: int):
-        super().__init__()
-        self.row = row
-        self.col = col
-        self.value = value
+    """Places a value in a grid cell.
+
+    Moves are immutable and interned: `GridMove(row, col, value)` always returns the
+    same object for the same arguments, so generating moves doesn't allocate and
+    moves can be compared and hashed by identity.
+    """
+
+    __slots__ = ("row", "col", "value")
+    _interned: dict[tuple[type, int, int, int], "GridMove"] = {}
+
+    def __new__(cls, row: int, col: int, value: int):
+        key = (cls, row, col, value)
+        move = GridMove._interned.get(key)
+        if move is None:
+            move = super().__new__(cls)
+            move.row = row
+            move.col = col
+            move.value = value
+            GridMove._interned[key] = move
+        return move
+
+    def __reduce__(self):
+        return type(self), (self.row, self.col, self.value)
 
     def _play(self, state: GridState[S]) -> None:
         state.data[self.row][self.col] = self.value
 
+    def is_played(self, state: GridState[S]) -> bool:
+        return state.data[self.row][self.col] == self.value
+
     def __repr__(self) -> str:
         return f"Place {self.value} at ({self.row}, {self.col})"
 
 
-class SolutionFound(Exception, Generic[S]):
-    def __init__(self, state: S):
-        self.state = state
-
+class Rule(NamedTuple):
+    """An inference rule: `find(state)` returns groups of forced moves, a single
+    empty group if the state is a dead end, or None if it finds nothing. It only runs
+    once the rules named in `requires` have found nothing, since it may rely on what
+    they enforce.
+    """
+
+    name: str
+    find: Callable[[Any], Optional[list[list["Move"]]]]
+    requires: tuple[str, ...] = ()
+
+
+class RuleStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.forced = 0  # calls that found forced moves
+        self.dead_ends = 0  # calls that found a dead end
+        self.skipped = 0
+
+    def score(self) -> float:
+        """Results per second. Rules that haven't run yet come first."""
+        if self.calls == 0:
+            return float("inf")
+        return (self.forced + self.dead_ends) / max(self.seconds, 1e-9)
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "forced": self.forced,
+            "dead_ends": self.dead_ends,
+            "skipped": self.skipped,
+            "score": self.score(),
+        }
+
+
+class RuleSchedule:
+    """Runs a game's inference rules in turn until one finds something, and records
+    in `stats` how long each rule takes and how often it finds forced moves or a
+    dead end.
+
+    If `adaptive`, every `reorder_every` runs the rules are reordered by results per
+    second, and a rule that found nothing in its first `min_calls` calls is skipped
+    (along with the rules that require it) except once every `retry_every` runs, in
+    case it becomes useful deeper in the search. Skipping a rule only delays what it
+    would find as long as the game checks complete states, but the search then
+    depends on timings and isn't reproducible.
+    """
 
-def play_necessary_moves(state: S) -> tuple[S, list[list[Move]], int]:
+    def __init__(
+        self,
+        rules: list[Rule],
+        adaptive: bool = False,
+        reorder_every: int = 100,
+        min_calls: int = 200,
+        retry_every: int = 20,
+    ) -> None:
+        for i, rule in enumerate(rules):
+            earlier = {r.name for r in rules[:i]}
+            assert earlier.issuperset(rule.requires), f"{rule.name} runs too early."
+        self.rules = rules
+        self.order = list(rules)
+        self.adaptive = adaptive
+        self.reorder_every = reorder_every
+        self.min_calls = min_calls
+        self.retry_every = retry_every
+        self.stats = {rule.name: RuleStats() for rule in rules}
+        self.runs = 0
+
+    def run(self, state: State) -> Optional[list[list["Move"]]]:
+        self.runs += 1
+        if self.adaptive and self.runs % self.reorder_every == 0:
+            self.reorder()
+        retry = self.runs % self.retry_every == 0
+        found_nothing = set()
+        for rule in self.order:
+            stats = self.stats[rule.name]
+            if not found_nothing.issuperset(rule.requires) or (
+                self.adaptive and not retry and self._is_useless(stats)
+            ):
+                stats.skipped += 1
+                continue
+            start = time.perf_counter()
+            moves = rule.find(state)
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+            if moves is not None:
+                if moves:
+                    stats.forced += 1
+                else:
+                    stats.dead_ends += 1
+                return moves
+            found_nothing.add(rule.name)
+        return None
+
+    def _is_useless(self, stats: RuleStats) -> bool:
+        return stats.calls >= self.min_calls and not stats.forced + stats.dead_ends
+
+    def reorder(self) -> None:
+        """Order the rules by results per second, keeping each after those it
+        requires.
+        """
+        pending = sorted(self.rules, key=lambda r: -self.stats[r.name].score())
+        placed: set[str] = set()
+        self.order = []
+        while pending:
+            rule = next(r for r in pending if placed.issuperset(r.requires))
+            pending.remove(rule)
+            placed.add(rule.name)
+            self.order.append(rule)
+
+
+def play_necessary_moves(
+    state: S,
+    forced_moves: Optional[list[tuple[Move, Optional[list[Move]]]]] = None,
+    max_batches: int | None = None,
+) -> tuple[S, list[list[Move]], int]:
+    """Play forced moves until there are none left.
+
+    Returns no legal moves if the state is solved or a dead end. If the state returns
+    several forced moves at once, they are all played before generating moves again.
+
+    If `forced_moves` is given, every forced move is appended to it along with the
+    state's explanation of why it was forced (see `State.explain`).
+
+    If `max_batches` is given, stops after playing that many batches of forced moves,
+    even if some are left.
+    """
+    legal_moves = state.generate_legal_moves()
+    batches = 0
     while True:
-        least_options = float("inf")
-        legal_moves = state.generate_legal_moves()
-        for move_options in legal_moves:
-            num_move_options = len(move_options)
-            if num_move_options == 1:
-                move_options[0].play(state)
-                break
-            if num_move_options == 0:
-                return state, [], 0
-            least_options = min(num_move_options, least_options)
-        else:
+        least_options = min(map(len, legal_moves), default=float("inf"))
+        if least_options == 0:
+            return state, [], 0
+        if least_options > 1 or batches == max_batches:
             break
+        batches += 1
+        # Play every forced move found in this pass before generating moves again.
+        # Each was forced before the others were played, so if one of them has
+        # become illegal since, its cell has no options left.
+        batch = [options[0] for options in legal_moves if len(options) == 1]
+        played = []
+        for move in batch:
+            if played:
+                if move.is_played(state):
+                    continue
+                if not state.is_legal(move):
+                    return state, [], 0
+            if forced_moves is not None:
+                forced_moves.append((move, state.explain(move)))
+            move.play(state)
+            played.append(move)
+        # Only what the batch changed can hold new forced moves; once there are none
+        # left, scan everything to get the remaining choices.
+        legal_moves = state.generate_forced_moves(played)
+        if not legal_moves:
+            legal_moves = state.generate_legal_moves()
 
-    assert legal_moves is not None
-    if not legal_moves and state.is_solved():
-        raise SolutionFound(state)
+    return state, legal_moves, least_options  # type: ignore
 
-    assert least_options != 1, "Should have played all necessary moves."
 
-    return state, legal_moves, least_options  # type: ignore
+class NogoodStore:
+    """A bounded set of nogoods: sets of moves that can't all be part of a solution.
+
+    Nogoods are indexed by each of their moves so that checking a candidate move only
+    looks at the nogoods it appears in. When full, the oldest nogood is dropped.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.nogoods: dict[frozenset[Move], None] = {}
+        self.by_move: dict[Move, dict[frozenset[Move], None]] = {}
+        self.prunes = 0
+
+    def __len__(self) -> int:
+        return len(self.nogoods)
+
+    def add(self, nogood: frozenset[Move]) -> None:
+        if nogood in self.nogoods:
+            return
+        if len(self.nogoods) >= self.max_size:
+            oldest = next(iter(self.nogoods))
+            del self.nogoods[oldest]
+            for move in oldest:
+                del self.by_move[move][oldest]
+        self.nogoods[nogood] = None
+        for move in nogood:
+            self.by_move.setdefault(move, {})[nogood] = None
+
+    def find(self, move: Move, state: State) -> Optional[frozenset[Move]]:
+        """If playing `move` in `state` would complete a nogood, return the rest of it."""
+        for nogood in self.by_move.get(move, ()):
+            if all(m is move or m.is_played(state) for m in nogood):
+                self.prunes += 1
+                return nogood - {move}
+        return None
+
+
+class Prober:
+    """Failed-literal probing: before a node branches, each option in its smallest
+    groups is played on a copy of its state along with up to `max_depth` batches of
+    the forced moves that follow. Options that run into a dead end are refuted
+    without creating nodes for them.
+
+    Results are cached by state and move, up to `max_cache` of them. The number of
+    options probed per node adapts between 1 and `max_budget`: it doubles after a
+    node where probing refuted something and halves after one where it didn't.
+    """
+
+    def __init__(
+        self, max_budget: int, max_depth: int | None = None, max_cache: int = 100_000
+    ) -> None:
+        self.max_budget = max_budget
+        self.max_depth = max_depth
+        self.max_cache = max_cache
+        self.budget = max_budget
+        self.cache: dict[tuple, bool] = {}
+        self.probes = 0
+        self.refutations = 0
+        self.cache_hits = 0
+
+    def fails(self, state: State, key, move: Move) -> bool:
+        """Whether playing `move` in `state` (whose `State.key()` is `key`) leads to
+        a dead end through forced moves alone.
+        """
+        if (key, move) in self.cache:
+            self.cache_hits += 1
+            return self.cache[key, move]
+        self.probes += 1
+        probe = state.copy()
+        move.play(probe)
+        probe, legal_moves, _ = play_necessary_moves(probe, max_batches=self.max_depth)
+        failed = not legal_moves and not probe.is_solved()
+        if len(self.cache) >= self.max_cache:
+            del self.cache[next(iter(self.cache))]
+        self.cache[key, move] = failed
+        return failed
+
+    def adapt(self, refuted: bool) -> None:
+        if refuted:
+            self.budget = min(self.max_budget, 2 * self.budget)
+        else:
+            self.budget = max(1, self.budget // 2)
+
+
+class Decomposer:
+    """Solves the independent parts of a state (see `State.split`) separately, each
+    with an engine like `engine`'s, and combines their solutions, so that the search
+    adds up the parts' branching instead of multiplying it.
+
+    A part without a solution makes the whole state a dead end, so the first solution
+    of every part is searched for straight away: smallest part first, or all at once
+    on `executor` (e.g. a `ProcessPoolExecutor`) if given. Further solutions are only
+    searched for once every combination of the ones found so far has been reported.
+    The parts' searches count towards `engine`'s nodes and budget.
+    """
+
+    def __init__(self, engine: "GameEngine", executor=None) -> None:
+        self.engine = engine
+        self.executor = executor
+        self.splits = 0
+        self.parts = 0
+
+    def solve(self, state: S, parts: list[S]) -> Optional[Iterator[S]]:
+        """Return the solutions of `state` combined from its `parts`' (none if a part
+        has none), or None if the budget ran out before every part had a solution.
+        """
+        self.splits += 1
+        self.parts += len(parts)
+        futures = []
+        if self.executor is None:
+            results = map(self._first_solution, parts)
+        else:
+            # Each part gets what is left of the budget, and can't be cancelled.
+            budget = self.budget()
+            futures = [
+                self.executor.submit(
+                    _first_solution, self.engine.part_engine(part), *budget
+                )
+                for part in parts
+            ]
+            results = (future.result() for future in futures)
+        firsts = []
+        try:
+            for solution, stop_reason, nodes in results:
+                self.engine.nodes_explored += nodes
+                if stop_reason is not None:
+                    return None
+                if solution is None:
+                    return iter(())
+                firsts.append(solution)
+        finally:
+            for future in futures:
+                future.cancel()  # not needed after a dead end
+        return self._combinations(state, parts, firsts)
+
+    def budget(self) -> tuple[int | None, float | None]:
+        """What is left of `engine`'s node limit and time limit."""
+        engine = self.engine
+        max_nodes = timeout = None
+        if engine.node_limit is not None:
+            max_nodes = max(0, engine.node_limit - engine.nodes_explored)
+        if engine.deadline is not None:
+            timeout = engine.deadline - time.monotonic()
+        return max_nodes, timeout
+
+    def _first_solution(self, part: S) -> tuple[Optional[S], Optional[str], int]:
+        engine = self.engine.part_engine(part)
+        return _first_solution(engine, *self.budget(), self.engine.cancel)
+
+    def _combinations(self, state: S, parts: list[S], firsts: list[S]) -> Iterator[S]:
+        yield state.merge(firsts)
+        found = [[first] for first in firsts]
+        for i, part in enumerate(parts):
+            # Each new solution of this part goes with every solution found of the
+            # parts before it and the first one of the parts after it.
+            engine = self.engine.part_engine(part)
+            try:
+                for solution in engine.solve_iter(*self.budget(), self.engine.cancel):
+                    if solution.data == firsts[i].data:
+                        continue
+                    others = found[:i] + [[solution]] + found[i + 1 :]
+                    for combination in product(*others):
+                        yield state.merge(list(combination))
+                    found[i].append(solution)
+            finally:
+                self.engine.nodes_explored += engine.nodes_explored
+            if engine.stop_reason is not None:
+                self.engine.stop_reason = engine.stop_reason
+                return
+
+
+def _first_solution(
+    engine: "GameEngine[S]",
+    max_nodes: int | None,
+    timeout: float | None,
+    cancel=None,
+) -> tuple[Optional[S], Optional[str], int]:
+    # A function of its own so that it can run in another process.
+    solution = next(engine.solve_iter(max_nodes, timeout, cancel), None)
+    return solution, engine.stop_reason, engine.nodes_explored
 
 
 class GameTreeNode(Generic[S]):
+    """A state in the search tree.
+
+    When the tree has a nogood store, each node also keeps the reasons for what it
+    knows, as sets of moves played further up the tree: `assignments` maps the moves
+    played at this node (its parent move and any forced moves) to the moves they
+    follow from, and `illegal_moves` maps refuted moves to the moves that refute them.
+    A dead end is then explained by a conflict set of moves, which lets the parent skip
+    straight past decisions that played no part in it (backjumping) and is recorded
+    as a nogood so that other branches don't rediscover it.
+    """
+
     def __init__(
         self,
         state: S,
@@ -211,86 +724,411 @@ class GameTreeNode(Generic[S]):
         parent_move: Move[S],
     ):
         self.parent = parent
+        self.root: "GameTreeRoot[S]" = parent.root
         self.parent_move = parent_move
         self.explored_moves: dict[Move, Optional["GameTreeNode[S]"]] = {}
+        self.illegal_moves: dict[Move, Optional[frozenset[Move]]] = {}
+        self.assignments: dict[Move, frozenset[Move]] = {}
+        # The group this node branches on, set when its first move is explored. Its
+        # moves exclude each other, so the children's solutions never overlap.
+        self.branch_group: Optional[list[Move]] = None
+        if parent_move is not None:
+            self.assignments[parent_move] = frozenset((parent_move,))
         self.state = state
 
     def initialize(self):
+        learning = self.root.nogoods is not None
+        forced_moves = [] if learning else None
         self.state, self.legal_moves, self.least_options = play_necessary_moves(
-            self.state
+            self.state, forced_moves
         )
+        for move, explanation in forced_moves or ():
+            self.assignments[move] = self.reason(explanation)
+        # Moves refuted further up the tree (see `play_forced_move`) hold here too.
+        for move in self.illegal_moves:
+            if move.is_played(self.state):
+                conflict = None
+                if learning:
+                    conflict = self.refutation_reason([move]) | self.reason([move])
+                self.parent.mark_child_as_illegal(self, conflict)
+                return self
         if not self.legal_moves:
-            self.parent.mark_child_as_illegal(self)
+            # Solutions are reported to the root and then treated like dead ends so
+            # the search moves on to the next one.
+            conflict = None
+            if self.state.is_solved():
+                self.root.solutions.append([self.state])
+                if learning:
+                    conflict = self.path_decisions()
+            elif learning:
+                conflict = self.reason(self.state.explain_dead_end())
+            self.parent.mark_child_as_illegal(self, conflict)
+        elif not self.illegal_moves or not self.check_for_forced_move():
+            if self.illegal_moves:
+                self.recalc_least_options()
+            elif self.root.decomposer is not None and self.decompose():
+                return self
+            replaced = learning and self.prune_with_nogoods()
+            if not replaced and self.root.prober is not None:
+                self.probe()
         return self
 
-    def mark_child_as_illegal(self, child: "GameTreeNode[S]"):
+    def decompose(self) -> bool:
+        """Solve the state's independent parts separately if it splits, see
+        `Decomposer`. Returns whether it did, in which case this node is done.
+
+        Only nodes without refuted moves split, since the parts' searches don't know
+        about them.
+        """
+        parts = self.state.split()
+        if parts is None:
+            return False
+        solutions = self.root.decomposer.solve(self.state, parts)
+        if solutions is None:
+            return False  # out of budget, which the search will notice
+        self.root.solutions.append(solutions)
+        conflict = None
+        if self.root.nogoods is not None:
+            conflict = self.path_decisions()
+        self.parent.mark_child_as_illegal(self, conflict)
+        return True
+
+    def reason(self, explanation: Optional[Iterable[Move]]) -> frozenset[Move]:
+        """Replace the moves in `explanation` that were forced at this node by their
+        own reasons, leaving only this node's parent move and moves played above it.
+
+        An unknown explanation (None) stands for every decision on the path here.
+        """
+        if explanation is None:
+            return self.path_decisions()
+        reason = set()
+        for move in explanation:
+            reason.update(self.assignments.get(move, (move,)))
+        return frozenset(reason)
+
+    def path_decisions(self) -> frozenset[Move]:
+        decisions = set()
+        node = self
+        while node is not self.root:
+            if node.parent_move is not None:
+                decisions.add(node.parent_move)
+            node = node.parent
+        return frozenset(decisions)
+
+    def path(self) -> list[Move[S]]:
+        """The moves leading from the starting node to this node."""
+        path = []
+        node = self
+        while node.parent_move is not None:
+            path.append(node.parent_move)
+            node = node.parent
+        return path[::-1]
+
+    def to_nogood(self, conflict: frozenset[Move]) -> frozenset[Move]:
+        """Rewrite `conflict` in terms of the decisions on the path to this node."""
+        decisions = set()
+        node = self
+        while node is not self.root:
+            conflict = node.reason(conflict)
+            if node.parent_move is not None:
+                decisions.add(node.parent_move)
+            node = node.parent
+        return conflict & decisions
+
+    def mark_child_as_illegal(
+        self, child: "GameTreeNode[S]", conflict: Optional[frozenset[Move]] = None
+    ):
         for move, explored_node in self.explored_moves.items():
             if explored_node is child:
-                move.is_legal = False
-                self.explored_moves[move] = None
-                was_forced = self.check_for_forced_move()
-                if not was_forced:
-                    self.recalc_least_options()
+                if conflict is not None:
+                    if move not in conflict:
+                        # The child's move played no part in the dead end, so this
+                        # node is a dead end too.
+                        self.parent.mark_child_as_illegal(self, self.reason(conflict))
+                        return
+                    conflict = conflict - {move}
+                    self.root.nogoods.add(self.to_nogood(conflict) | {move})
+                self.refute_move(move, conflict)
+                break
+
+    def refute_move(self, move: Move[S], reason: Optional[frozenset[Move]]) -> bool:
+        """Mark `move` as illegal and play any move this forces.
+
+        Returns whether a forced move was played, in which case this node has been
+        replaced in the tree.
+        """
+        self.illegal_moves[move] = reason
+        if move in self.explored_moves:
+            self.explored_moves[move] = None
+        was_forced = self.check_for_forced_move()
+        if not was_forced:
+            self.recalc_least_options()
+        return was_forced
+
+    def prune_with_nogoods(self) -> bool:
+        """Refute the moves that complete a nogood. Returns whether a forced move was
+        played, in which case this node has been replaced in the tree.
+        """
+        for move_options in self.legal_moves:
+            for move in move_options:
+                if move in self.illegal_moves:
+                    continue
+                reason = self.root.nogoods.find(move, self.state)
+                if reason is not None and self.refute_move(move, self.reason(reason)):
+                    return True
+        return False
+
+    def probe(self):
+        """Refute the options in the smallest groups that lead straight to a dead end
+        (see `Prober`).
+        """
+        prober = self.root.prober
+        key = self.state.key()
+        groups = sorted(map(self.legal_options, self.legal_moves), key=len)
+        refuted = False
+        for move in islice(chain.from_iterable(groups), prober.budget):
+            if not prober.fails(self.state, key, move):
+                continue
+            prober.refutations += 1
+            refuted = True
+            # The dead end follows from this node's state, i.e. every decision above
+            # it, so there's no narrower reason to give.
+            if self.refute_move(move, None):
                 break
+        prober.adapt(refuted)
 
     def recalc_least_options(self):
         self.least_options = float("inf")
         for move_options in self.legal_moves:
-            num_move_options = len([m for m in move_options if m.is_legal])
+            num_move_options = len(self.legal_options(move_options))
             self.least_options = min(self.least_options, num_move_options)
         assert self.least_options != 1, "Should have played all necessary moves."
 
+    def legal_options(self, move_options: list[Move[S]]) -> list[Move[S]]:
+        return [m for m in move_options if m not in self.illegal_moves]
+
     def replace_child_with(self, move: Move[S], new_child: "GameTreeNode[S]"):
         assert move in self.explored_moves, "Move not found among explored moves."
         self.explored_moves[move] = new_child
 
     def check_for_forced_move(self):
+        """Play the first forced move, or give up on this node if a group has no
+        options left. Returns whether this node has been replaced in the tree.
+        """
         for move_options in self.legal_moves:
-            move_options = [m for m in move_options if m.is_legal]
-            assert len(move_options) > 0, "Should have already played the forced move."
-            if len(move_options) == 1:
-                self.play_forced_move(move_options[0])
+            legal_options = self.legal_options(move_options)
+            if not legal_options:
+                # Only possible when refutations were inherited from further up.
+                conflict = None
+                if self.root.nogoods is not None:
+                    conflict = self.refutation_reason(move_options)
+                self.parent.mark_child_as_illegal(self, conflict)
+                return True
+            if len(legal_options) == 1:
+                forced_move = legal_options[0]
+                reason = None
+                if self.root.nogoods is not None:
+                    reason = self.forced_reason(forced_move, move_options)
+                self.play_forced_move(forced_move, reason)
                 return True
         return False
 
-    def play_forced_move(self, forced_move: Move):
+    def forced_reason(
+        self, forced_move: Move[S], move_options: list[Move[S]]
+    ) -> frozenset[Move]:
+        # The other options were either ruled out by the game rules or refuted.
+        others = [move for move in move_options if move is not forced_move]
+        refuted = self.refutation_reason(others)
+        return self.reason(self.state.explain(forced_move)) | refuted
+
+    def refutation_reason(self, moves: Iterable[Move[S]]) -> frozenset[Move]:
+        """The reasons why the refuted `moves` can't be played."""
+        reason = set()
+        for move in moves:
+            if self.illegal_moves[move] is None:
+                return self.path_decisions()
+            reason.update(self.reason(self.illegal_moves[move]))
+        return frozenset(reason)
+
+    def play_forced_move(
+        self, forced_move: Move, reason: Optional[frozenset[Move]] = None
+    ):
         if forced_move in self.explored_moves:
             new_node = self.explored_moves[forced_move]
+            assert new_node is not None, "Forced move was marked illegal."
             new_node.parent = self.parent
             new_node.parent_move = self.parent_move
-            assert new_node is not None, "Forced move was marked illegal."
+            if reason is not None:
+                new_node.take_place_of(self, forced_move, reason)
             self.parent.replace_child_with(self.parent_move, new_node)
         else:
             forced_move.play(self.state)
             new_node = GameTreeNode(self.state, self.parent, self.parent_move)
+            # The new node's solutions are some of this node's, so what this node
+            # refuted still holds. Solutions already found were refuted too, so
+            # keeping these also stops them from being reported again.
+            new_node.illegal_moves.update(self.illegal_moves)
+            if reason is not None:
+                new_node.assignments.update(self.assignments)
+                new_node.assignments[forced_move] = reason
             self.parent.replace_child_with(self.parent_move, new_node)
             new_node.initialize()
 
-    def explore_move(self, move: Move):
+    def take_place_of(
+        self, node: "GameTreeNode[S]", forced_move: Move[S], reason: frozenset[Move]
+    ):
+        """Update the reasons of this child of `node` now that its move is forced."""
+        assignments = dict(node.assignments)
+        assignments[forced_move] = reason
+        for move, move_reason in self.assignments.items():
+            if move is forced_move:
+                continue
+            if forced_move in move_reason:
+                move_reason = (move_reason - {forced_move}) | reason
+            assignments[move] = move_reason
+        self.assignments = assignments
+
+    def explore_move(self, move: Move) -> Optional["GameTreeNode[S]"]:
+        """Explore `move` and return the new child, or None if a nogood refutes it."""
+        if self.root.nogoods is not None:
+            reason = self.root.nogoods.find(move, self.state)
+            if reason is not None:
+                self.refute_move(move, self.reason(reason))
+                return None
+
+        if self.branch_group is None:
+            self.branch_group = min(
+                (group for group in self.legal_moves if move in group),
+                key=lambda group: len(self.legal_options(group)),
+            )
         new_state = self.state.copy()
         move.play(new_state)
 
         child_node = GameTreeNode(new_state, self, move)
         self.explored_moves[move] = child_node
-        child_node.initialize()
+        return child_node.initialize()
 
 
 class GameTreeRoot(GameTreeNode[S]):
-    def __init__(self, starting_state: S):
-        self.starting_node = GameTreeNode(starting_state, self, None).initialize()
+    def __init__(
+        self,
+        starting_state: S,
+        illegal_moves: Optional[dict[Move[S], Optional[frozenset[Move]]]] = None,
+        nogoods: Optional[NogoodStore] = None,
+        verbose: bool = True,
+        prober: Optional[Prober] = None,
+        decomposer: Optional[Decomposer] = None,
+    ):
+        self.root = self
+        self.nogoods = nogoods
+        self.prober = prober
+        self.decomposer = decomposer
+        self.verbose = verbose
+        # Solutions found but not reported yet, in batches.
+        self.solutions: list[Iterable[S]] = []
+        self.exhausted = False
+        self.starting_node = GameTreeNode(starting_state, self, None)
+        if illegal_moves:
+            self.starting_node.illegal_moves.update(illegal_moves)
+        self.starting_node.initialize()
+        if illegal_moves:
+            self.starting_node.recalc_least_options()
+
+    def find(self, path: list[Move[S]]) -> GameTreeNode[S]:
+        node = self.starting_node
+        for move in path:
+            node = node.explored_moves[move]
+        return node
 
     def replace_child_with(self, move: Move[S] | None, new_child: "GameTreeNode[S]"):
         self.starting_node = new_child
-        print(self.starting_node.state)
+        if self.verbose:
+            print(self.starting_node.state)
 
-    def mark_child_as_illegal(self, child: "GameTreeNode[S]"):
-        print(child.state)
-        raise Exception("No solution exists.")
+    def mark_child_as_illegal(
+        self, child: "GameTreeNode[S]", conflict: Optional[frozenset[Move]] = None
+    ):
+        self.exhausted = True
 
 
 class GameEngine(Generic[S]):
-    def __init__(self, start_state: S) -> None:
+    """Searches the game tree for a solution.
+
+    If `seed` is given, ties between equally constrained moves are broken randomly
+    (reproducibly) instead of always taking the first one. If `restart_interval` is
+    given, the search restarts after `luby(i) * restart_interval` explored nodes on the
+    i-th run. Restarts keep what was learned about the starting node (its forced moves
+    and illegal moves) since those facts hold in every branch. Combining the two avoids
+    the very long runs caused by an unlucky early choice.
+
+    If `max_nogoods` is given, dead ends are explained in terms of earlier moves (as
+    far as the game's `State.explain` methods allow) so the search can backjump past
+    irrelevant decisions, and up to `max_nogoods` of these explanations are kept to
+    prune other branches. Nogoods hold in every branch so they survive restarts.
+
+    If `value_ordering` is set, moves within the chosen group are tried in the order
+    given by the game's `State.order_moves`.
+
+    Games that list their inference rules in `State.RULES` run them through a
+    `RuleSchedule`, whose per-rule telemetry `rule_stats()` returns. If
+    `adaptive_rules` is set, the rules are reordered and skipped by how much they
+    find per second. The search then depends on timings and isn't reproducible.
+
+    If `probe_budget` is given, each node first probes up to that many of its options
+    and refutes the ones whose forced moves (up to `probe_depth` batches of them) lead
+    to a dead end, see `Prober`. This needs the game's `State.key`.
+
+    If `decompose` is set, states that split into independent parts (see
+    `State.split`) have each part solved by an engine of its own, see `Decomposer`.
+    The parts are solved in parallel if an `executor` is given.
+
+    Set `verbose` to False to stop printing the starting state whenever it changes.
+    A `render.TerminalRenderer` passed as `renderer` is shown each state the search
+    explores instead, and turns `verbose` off.
+    """
+
+    def __init__(
+        self,
+        start_state: S,
+        seed: int | None = None,
+        restart_interval: int | None = None,
+        max_nogoods: int | None = None,
+        verbose: bool = True,
+        renderer=None,
+        value_ordering: bool = False,
+        probe_budget: int | None = None,
+        probe_depth: int | None = None,
+        adaptive_rules: bool = False,
+        decompose: bool = False,
+        executor=None,
+    ) -> None:
         self.start_state = start_state
+        self.verbose = verbose and renderer is None
+        self.value_ordering = value_ordering
+        self.renderer = renderer
+        self.seed = seed
+        self.rng = None if seed is None else random.Random(seed)
+        self.restart_interval = restart_interval
+        self.nogoods = None if max_nogoods is None else NogoodStore(max_nogoods)
+        self.rules = None
+        if start_state.RULES:
+            self.rules = RuleSchedule(start_state.RULES, adaptive_rules)
+        self.prober = None
+        if probe_budget is not None:
+            self.prober = Prober(probe_budget, probe_depth)
+        self.decomposer = None
+        if decompose:
+            self.decomposer = Decomposer(self, executor)
+        self.nodes_explored = 0
+        self.restarts = 0
+        self.solutions_found = 0
+        self.stop_reason: str | None = None
+        self.best_state: S | None = None
+        self.started_at = time.monotonic()
+        # The limits of the current search.
+        self.node_limit: int | None = None
+        self.deadline: float | None = None
+        self.cancel = None
 
     def choose_next_explore(
         self, root: GameTreeRoot[S]
@@ -299,21 +1137,39 @@ class GameEngine(Generic[S]):
 
         best_node = None
         best_num = float("inf")
-        best_move = None
+        best_moves = None
+        num_ties = 0
 
         while stack:
             node, depth = stack.pop(len(stack) - 1)
 
-            for move_options in node.legal_moves:
-                move_options = [m for m in move_options if m.is_legal]
-                if len(move_options) < best_num:
-                    unexplored_moves = [
-                        m for m in move_options if m not in node.explored_moves
-                    ]
-                    if unexplored_moves:
-                        best_node = node
-                        best_move = unexplored_moves[0]
-                        best_num = len(move_options)
+            groups = node.legal_moves
+            if node.branch_group is not None:
+                groups = [node.branch_group]
+            for move_options in groups:
+                # Only the node's refuted moves can make a group smaller, so skip
+                # groups that can't beat the best one without filtering them.
+                if len(move_options) - len(node.illegal_moves) > best_num:
+                    continue
+                move_options = node.legal_options(move_options)
+                num_options = len(move_options)
+                if num_options > best_num or (
+                    num_options == best_num and self.rng is None
+                ):
+                    continue
+                unexplored_moves = [
+                    m for m in move_options if m not in node.explored_moves
+                ]
+                if not unexplored_moves:
+                    continue
+                if num_options < best_num:
+                    best_num = num_options
+                    num_ties = 0
+                num_ties += 1
+                if self.rng is None or self.rng.randrange(num_ties) == 0:
+                    # With an rng this is reservoir sampling.
+                    best_node = node
+                    best_moves = unexplored_moves
 
             if best_num == 2:
                 break
@@ -325,20 +1181,233 @@ class GameEngine(Generic[S]):
         if best_node is None:
             raise Exception("No moves to explore.")
 
+        ordered = None
+        if self.value_ordering and len(best_moves) > 1:
+            ordered = best_node.state.order_moves(best_moves, best_node.legal_moves)
+        if ordered is not None:
+            best_move = ordered[0]
+        elif self.rng is not None:
+            best_move = self.rng.choice(best_moves)
+        else:
+            best_move = best_moves[0]
+
         # print(f"Exploring move at depth {depth} with {best_num} options.")
         return best_node, best_move
 
-    def build_tree(self) -> GameTreeNode[S]:
-        root = GameTreeRoot(self.start_state)
+    def restart(self, root: GameTreeRoot[S]) -> GameTreeRoot[S]:
+        starting_node = root.starting_node
+        self.restarts += 1
+        return GameTreeRoot(
+            starting_node.state.copy(),
+            illegal_moves=starting_node.illegal_moves,
+            nogoods=self.nogoods,
+            verbose=self.verbose,
+            prober=self.prober,
+            decomposer=self.decomposer,
+        )
+
+    def part_engine(self, part: S) -> "GameEngine[S]":
+        """An engine like this one, without its limits, to solve a part of a split
+        state.
+        """
+        return GameEngine(
+            part,
+            seed=self.seed,
+            max_nogoods=None if self.nogoods is None else self.nogoods.max_size,
+            verbose=False,
+            value_ordering=self.value_ordering,
+            probe_budget=None if self.prober is None else self.prober.max_budget,
+            probe_depth=None if self.prober is None else self.prober.max_depth,
+            decompose=True,
+        )
 
-        while True:
-            node, move = self.choose_next_explore(root)
-            node.explore_move(move)
+    def _search(
+        self,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        cancel=None,
+        chunk_size: int | None = None,
+        checkpoint=None,
+    ) -> Iterator[Optional[S]]:
+        """Yield solutions as they are found and, if `chunk_size` is given, None after
+        every `chunk_size` explored nodes.
+
+        Stops early once `max_nodes` nodes have been explored, `timeout` seconds have
+        passed or `cancel.is_set()` (e.g. a `threading.Event`) is true. `stop_reason`
+        then says why and `best_state` holds the starting state reached so far, i.e.
+        every move known to be part of any remaining solution.
+
+        If a `checkpoint.Checkpoint` is given, the search first replays the decisions
+        saved in it and then records its own. Solutions found before are reported again.
+        """
+        self.stop_reason = None
+        self.started_at = time.monotonic()
+        self.deadline = None if timeout is None else self.started_at + timeout
+        self.node_limit = None if max_nodes is None else self.nodes_explored + max_nodes
+        self.cancel = cancel
+        replay = iter(()) if checkpoint is None else iter(checkpoint.open(self))
+        replaying = checkpoint is not None
+        # The search plays moves on the root's state, so keep ours intact.
+        start_state = self.start_state.copy()
+        if self.rules is not None:
+            start_state.rules = self.rules
+        root = GameTreeRoot(
+            start_state,
+            nogoods=self.nogoods,
+            verbose=self.verbose,
+            prober=self.prober,
+            decomposer=self.decomposer,
+        )
+        next_restart = None
+        if self.restart_interval is not None:
+            next_restart = luby(1) * self.restart_interval
 
-    def solve(self) -> S:
         try:
-            self.build_tree()
-        except SolutionFound as e:
-            solution = e.state
-        assert solution.is_solved(), "Returned solution is not actually solved."
-        return solution
+            while True:
+                while root.solutions:
+                    for solution in root.solutions.pop(0):
+                        self.solutions_found += 1
+                        yield solution
+                # Combining the solutions of a split state's parts can run out of
+                # budget and set `stop_reason` (see `Decomposer`).
+                if root.exhausted and self.stop_reason is None:
+                    return
+                if self.stop_reason is None:
+                    self.stop_reason = self._out_of_budget()
+                if self.stop_reason is not None:
+                    self.best_state = root.starting_node.state.copy()
+                    return
+
+                event = next(replay, None) if replaying else None
+                replaying = event is not None
+                if event is not None and event[0] == "restart":
+                    restart = True
+                elif event is not None:
+                    restart = False
+                    _, path, move = event
+                    node = root.find(path)
+                else:
+                    # Restarting after a solution was found could report it again.
+                    restart = (
+                        next_restart is not None
+                        and self.nodes_explored >= next_restart
+                        and not self.solutions_found
+                    )
+                    if not restart:
+                        node, move = self.choose_next_explore(root)
+                    if checkpoint is not None and restart:
+                        checkpoint.record_restart()
+                    elif checkpoint is not None:
+                        checkpoint.record_explore(node.path(), move)
+
+                if restart:
+                    root = self.restart(root)
+                    next_restart += luby(self.restarts + 1) * self.restart_interval
+                    continue
+                child = node.explore_move(move)
+                if self.renderer is not None:
+                    self.renderer.update(node.state if child is None else child.state)
+                self.nodes_explored += 1
+                if chunk_size is not None and self.nodes_explored % chunk_size == 0:
+                    yield None
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    def _out_of_budget(self) -> Optional[str]:
+        if self.node_limit is not None and self.nodes_explored >= self.node_limit:
+            return "max_nodes"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "timeout"
+        if self.cancel is not None and self.cancel.is_set():
+            return "cancelled"
+        return None
+
+    def solve_iter(
+        self,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        cancel=None,
+        checkpoint=None,
+    ) -> Iterator[S]:
+        """Yield every solution, each as soon as it is found.
+
+        See `_search` for the arguments.
+        """
+        yield from self._search(max_nodes, timeout, cancel, checkpoint=checkpoint)
+
+    def solve(
+        self,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        cancel=None,
+        checkpoint=None,
+    ) -> S:
+        """Return the first solution.
+
+        If the budget runs out first, return the partial `best_state` instead (check
+        `is_solved()` and `stop_reason`). See `_search` for the arguments.
+        """
+        for solution in self.solve_iter(max_nodes, timeout, cancel, checkpoint):
+            assert solution.is_solved(), "Returned solution is not actually solved."
+            return solution
+        if self.stop_reason is not None:
+            return self.best_state
+        raise Exception("No solution exists.")
+
+    async def solve_async(
+        self,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        cancel=None,
+        chunk_size: int = 20,
+        checkpoint=None,
+    ) -> S:
+        """Like `solve`, but hands control back to the event loop every `chunk_size`
+        explored nodes so that many solves can share one asyncio process.
+        """
+        search = self._search(max_nodes, timeout, cancel, chunk_size, checkpoint)
+        for solution in search:
+            if solution is not None:
+                return solution
+            await asyncio.sleep(0)
+        if self.stop_reason is not None:
+            return self.best_state
+        raise Exception("No solution exists.")
+
+    def count_solutions(self, limit: int | None = None) -> int:
+        """Count the solutions, stopping early once `limit` are found.
+
+        `count_solutions(limit=2) == 1` checks that the solution is unique.
+        """
+        count = 0
+        for _ in self.solve_iter():
+            count += 1
+            if count == limit:
+                break
+        return count
+
+    def rule_stats(self) -> dict[str, dict[str, int | float]]:
+        """Per-rule telemetry for games with a `RuleSchedule`, in the order the rules
+        currently run.
+        """
+        if self.rules is None:
+            return {}
+        return {
+            rule.name: self.rules.stats[rule.name].as_dict()
+            for rule in self.rules.order
+        }
+
+    def stats(self) -> dict[str, int | float | str | None]:
+        return {
+            "nodes_explored": self.nodes_explored,
+            "restarts": self.restarts,
+            "solutions_found": self.solutions_found,
+            "nogoods": 0 if self.nogoods is None else len(self.nogoods),
+            "nogood_prunes": 0 if self.nogoods is None else self.nogoods.prunes,
+            "probes": 0 if self.prober is None else self.prober.probes,
+            "probe_refutations": 0 if self.prober is None else self.prober.refutations,
+            "splits": 0 if self.decomposer is None else self.decomposer.splits,
+            "seconds": time.monotonic() - self.started_at,
+            "stop_reason": self.stop_reason,
+        }
@@ -0,0 +1,246 @@
+"""Puzzles that divide a grid into polyomino regions, like fivecells.
+
+Every way of placing each shape on the grid (in any rotation or reflection, not
+crossing walls or blocked cells and passing the puzzle's own checks) is enumerated
+once, up front, and indexed by the cells it covers. A move places one of these
+regions, and the groups of moves are, for each empty cell, the placements that
+could still cover it. Placing a region rules out every placement that overlaps it
+through the index, so checking whether a placement is still possible is a lookup.
+"""
+
+from functools import cache
+from typing import Iterable, Optional
+
+from main import GridState, Move
+from util import grid_data_to_str
+
+Shape = tuple[tuple[int, int], ...]
+LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def normalize(cells: Iterable[tuple[int, int]]) -> Shape:
+    cells = list(cells)
+    top = min(r for r, _ in cells)
+    left = min(c for _, c in cells)
+    return tuple(sorted((r - top, c - left) for r, c in cells))
+
+
+def orientations(shape: Shape) -> list[Shape]:
+    """The distinct rotations and reflections of `shape`."""
+    result = set()
+    for cells in (shape, [(r, -c) for r, c in shape]):
+        for _ in range(4):
+            cells = [(c, -r) for r, c in cells]
+            result.add(normalize(cells))
+    return sorted(result)
+
+
+@cache
+def polyominoes(num_cells: int) -> list[Shape]:
+    """Every polyomino of `num_cells` cells, counting rotations and reflections of a
+    shape as the same shape (e.g. the 12 pentominoes).
+    """
+    shapes = {((0, 0),)}
+    for _ in range(num_cells - 1):
+        shapes = {
+            min(orientations(shape + ((r + dr, c + dc),)))
+            for shape in shapes
+            for r, c in shape
+            for dr, dc in GridState.DIRECTIONS
+            if (r + dr, c + dc) not in shape
+        }
+    return sorted(shapes)
+
+
+class PlacementMove(Move["RegionState"]):
+    """Places a region on `cells`. The region is labelled `index` in the grid."""
+
+    __slots__ = ("index", "cells")
+
+    def __init__(self, index: int, cells: Shape) -> None:
+        self.index = index
+        self.cells = cells
+
+    def _play(self, state: "RegionState") -> None:
+        state.place(self)
+
+    def is_played(self, state: "RegionState") -> bool:
+        row, col = self.cells[0]
+        return state.data[row][col] == self.index
+
+    def __repr__(self) -> str:
+        return f"Place region {self.index} on {list(self.cells)}"
+
+
+@cache
+def _placements(size: int, shapes: tuple[Shape, ...]) -> list[Shape]:
+    """The cells of every placement of `shapes` on an empty grid of `size`."""
+    placements = []
+    fixed_shapes = {o for shape in shapes for o in orientations(shape)}
+    for shape in sorted(fixed_shapes):
+        height = 1 + max(r for r, _ in shape)
+        width = 1 + max(c for _, c in shape)
+        for top in range(size - height + 1):
+            for left in range(size - width + 1):
+                placements.append(tuple((top + r, left + c) for r, c in shape))
+    return placements
+
+
+class PlacementIndex:
+    """Every placement of a puzzle, and the placements covering each cell."""
+
+    def __init__(self, state: "RegionState") -> None:
+        # Index 0 is left for blocked cells, so placements start at 1.
+        self.moves: list[Optional[PlacementMove]] = [None]
+        self.by_cell: dict[tuple[int, int], list[int]] = {
+            (row, col): [] for row, col, _ in state.iter_cells()
+        }
+        for cells in _placements(state.size, tuple(state.shapes)):
+            if state.can_place(cells):
+                move = PlacementMove(len(self.moves), cells)
+                self.moves.append(move)
+                for cell in cells:
+                    self.by_cell[cell].append(move.index)
+
+
+class RegionState(GridState):
+    """Divide the grid, apart from the `blocked` cells, into regions of the given
+    `shapes`. A wall between two adjacent cells (a pair in `walls`) keeps them in
+    different regions.
+
+    Subclasses add their rules by overriding `fits`, which can only look at the
+    placement itself: any rule about how a region borders the rest of the grid must
+    be decidable from the region's own cells.
+    """
+
+    BLOCKED = 0
+
+    def __init__(
+        self,
+        size: int,
+        shapes: list[Shape],
+        blocked: Iterable[tuple[int, int]] = (),
+        walls: Iterable[tuple[tuple[int, int], tuple[int, int]]] = (),
+    ) -> None:
+        super().__init__(size=size, max_value=None)
+        self.shapes = sorted({min(orientations(shape)) for shape in shapes})
+        for row, col in blocked:
+            self.data[row][col] = self.BLOCKED
+        self.walls = {frozenset(wall) for wall in walls}
+        sizes = {len(shape) for shape in self.shapes}
+        self.region_size = sizes.pop() if len(sizes) == 1 else None
+        self._index: Optional[PlacementIndex] = None
+        self.ruled_out: Optional[bytearray] = None  # by placement index
+
+    @property
+    def index(self) -> PlacementIndex:
+        if self._index is None:
+            self._index = PlacementIndex(self)
+            self.ruled_out = bytearray(len(self._index.moves))
+        return self._index
+
+    def copy(self):
+        self.index  # build it once so that every copy shares it
+        copy_state = type(self).__new__(type(self))
+        copy_state.__dict__.update(self.__dict__)
+        copy_state.data = [row[:] for row in self.data]
+        copy_state.ruled_out = bytearray(self.ruled_out)
+        return copy_state
+
+    def can_place(self, cells: Shape) -> bool:
+        if any(self.data[r][c] == self.BLOCKED for r, c in cells):
+            return False
+        if self.walls:
+            cell_set = set(cells)
+            for r, c in cells:
+                for neighbor in ((r + 1, c), (r, c + 1)):
+                    wall = frozenset(((r, c), neighbor))
+                    if neighbor in cell_set and wall in self.walls:
+                        return False
+        return self.fits(cells)
+
+    def fits(self, cells: Shape) -> bool:
+        """Whether the puzzle's rules allow a region on `cells`."""
+        return True
+
+    def place(self, move: PlacementMove) -> None:
+        by_cell = self.index.by_cell
+        ruled_out = self.ruled_out
+        for row, col in move.cells:
+            self.data[row][col] = move.index
+            for other in by_cell[(row, col)]:
+                ruled_out[other] = 1
+
+    def generate_legal_moves(self) -> list[list[PlacementMove]]:
+        if self.region_size is not None and not self._components_fit():
+            return [[]]
+        return super().generate_legal_moves()
+
+    def _generate_plausible_moves_for_cell(
+        self, row: int, col: int
+    ) -> list[PlacementMove]:
+        index = self.index
+        ruled_out = self.ruled_out
+        return [index.moves[i] for i in index.by_cell[(row, col)] if not ruled_out[i]]
+
+    def is_legal(self, move: PlacementMove) -> bool:
+        return not self.ruled_out[move.index]
+
+    def generate_forced_moves(
+        self, played: list[PlacementMove]
+    ) -> list[list[PlacementMove]]:
+        # Only cells that a placement overlapping a played one could have covered
+        # have lost options.
+        index = self.index
+        cells = dict.fromkeys(
+            cell
+            for move in played
+            for placed in move.cells
+            for other in index.by_cell[placed]
+            for cell in index.moves[other].cells
+            if self.data[cell[0]][cell[1]] is None
+        )
+        forced_moves = []
+        for row, col in cells:
+            legal_moves = self._generate_plausible_moves_for_cell(row, col)
+            if not legal_moves:
+                return [legal_moves]  # dead end
+            if len(legal_moves) == 1:
+                forced_moves.append(legal_moves)
+        return forced_moves
+
+    def constraint_scopes(self) -> Optional[list[list[tuple[int, int]]]]:
+        # A region covers connected empty cells and `fits` only looks at the region
+        # itself, so separate areas of empty cells can be divided independently.
+        areas = self._empty_areas()
+        return areas if len(areas) > 1 else None
+
+    def _components_fit(self) -> bool:
+        """Whether every area of connected empty cells could be divided into regions
+        as far as its number of cells goes.
+        """
+        return all(len(area) % self.region_size == 0 for area in self._empty_areas())
+
+    def _empty_areas(self) -> list[list[tuple[int, int]]]:
+        areas = []
+        seen = set()
+        for row, col, value in self.iter_cells():
+            if value is not None or (row, col) in seen:
+                continue
+            seen.add((row, col))
+            area = [(row, col)]
+            for r, c in area:
+                for nr, nc, neighbor in self.neighbors(r, c, with_pos=True):
+                    if neighbor is None and (nr, nc) not in seen:
+                        seen.add((nr, nc))
+                        area.append((nr, nc))
+            areas.append(area)
+        return areas
+
+    def __str__(self) -> str:
+        # Label regions by letter in the order they appear.
+        labels: dict[Optional[int], Optional[str]] = {None: None, self.BLOCKED: "■"}
+        for _, _, value in self.iter_cells():
+            if value not in labels:
+                labels[value] = LABELS[(len(labels) - 2) % len(LABELS)]
+        return grid_data_to_str([[labels[value] for value in row] for row in self.data])
@@ -0,0 +1,105 @@
+"""Live view of a running search in the terminal.
+
+Printing every state the search visits slows it down a lot, so `TerminalRenderer`
+instead keeps a reference to the latest state and a background thread draws it at
+most `fps` times per second. Only the characters that changed since the previous
+frame are written, using ANSI cursor positioning.
+
+Usage:
+    with TerminalRenderer() as renderer:
+        GameEngine(state, verbose=False, renderer=renderer).solve()
+
+The state is read while the search may still be changing it, so a frame can mix two
+consecutive states; the next frame catches up.
+"""
+
+import sys
+import threading
+from typing import TextIO
+
+from main import State
+
+# Writing a cursor move costs about as much as rewriting this many unchanged
+# characters, so shorter gaps between changes are rewritten instead.
+MIN_GAP = 6
+
+
+def diff_frames(old: list[str], new: list[str]) -> str:
+    """Return the escape sequences that turn the screen showing `old` into `new`."""
+    parts = []
+    for row, line in enumerate(new, start=1):
+        old_line = old[row - 1] if row <= len(old) else ""
+        if line == old_line:
+            continue
+        common = min(len(line), len(old_line))
+        col = 0
+        while col < common:
+            if line[col] == old_line[col]:
+                col += 1
+                continue
+            start = end = col
+            while col < common and col - end < MIN_GAP:
+                if line[col] != old_line[col]:
+                    end = col + 1
+                col += 1
+            parts.append(f"\x1b[{row};{start + 1}H{line[start:end]}")
+        if len(line) > common:
+            parts.append(f"\x1b[{row};{common + 1}H{line[common:]}")
+        elif len(old_line) > common:
+            parts.append(f"\x1b[{row};{common + 1}H\x1b[K")
+    for row in range(len(new) + 1, len(old) + 1):
+        parts.append(f"\x1b[{row};1H\x1b[K")
+    return "".join(parts)
+
+
+class TerminalRenderer:
+    def __init__(self, stream: TextIO = sys.stdout, fps: float = 20) -> None:
+        self.stream = stream
+        self.interval = 1 / fps
+        self.state: State | None = None
+        self.version = 0
+        self.frames = 0
+        self.lines: list[str] = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def update(self, state: State) -> None:
+        """Show `state` in the next frame. Cheap enough to call on every node."""
+        self.state = state
+        self.version += 1
+
+    def start(self) -> None:
+        self.stream.write("\x1b[2J\x1b[H")
+        self.thread.start()
+
+    def close(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+        self.draw()
+        self.stream.write(f"\x1b[{len(self.lines) + 1};1H")
+        self.stream.flush()
+
+    def __enter__(self) -> "TerminalRenderer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        drawn_version = 0
+        while not self.stopped.wait(self.interval):
+            if self.version != drawn_version:
+                drawn_version = self.version
+                self.draw()
+
+    def draw(self) -> None:
+        if self.state is None:
+            return
+        lines = str(self.state).expandtabs().splitlines()
+        changes = diff_frames(self.lines, lines)
+        if changes:
+            self.stream.write(changes)
+            self.stream.flush()
+        self.lines = lines
+        self.frames += 1
@@ -0,0 +1,149 @@
+"""Solve games with a SAT solver instead of the tree search.
+
+Games that can describe their rules as a CNF formula implement `State.to_cnf()`.
+Each variable stands for a move (and optionally another move for when it is false),
+so a satisfying assignment is turned back into a state by playing those moves.
+Rules that are awkward to write as forced moves, like Lookair's squares and line of
+sight, are often easy to write as clauses, and a CDCL solver handles them well.
+
+Solving needs PySAT (`pip install python-sat`) or pycosat (`pip install pycosat`).
+Encoding and DIMACS export work without either.
+"""
+
+import itertools
+import time
+from typing import Iterable, Iterator, Optional
+
+from main import Move, State
+
+try:
+    from pysat.solvers import Solver as PySatSolver
+except ImportError:
+    PySatSolver = None
+
+try:
+    import pycosat
+except ImportError:
+    pycosat = None
+
+BACKENDS = [
+    name
+    for name, module in (("pysat", PySatSolver), ("pycosat", pycosat))
+    if module is not None
+]
+
+
+class CNF:
+    def __init__(self) -> None:
+        self.clauses: list[list[int]] = []
+        self.num_vars = 0
+        self._vars: dict[Move, int] = {}
+        self._moves: dict[int, tuple[Optional[Move], Optional[Move]]] = {}
+
+    def var(self, move: Optional[Move] = None, move_if_false: Optional[Move] = None):
+        """Return the variable for `move`, creating it if needed.
+
+        When decoding, `move` is played if the variable is true and `move_if_false`
+        if it is false. Without any move, a new auxiliary variable is returned.
+        """
+        if move is not None and move in self._vars:
+            return self._vars[move]
+        self.num_vars += 1
+        if move is not None:
+            self._vars[move] = self.num_vars
+            self._moves[self.num_vars] = (move, move_if_false)
+        return self.num_vars
+
+    def add(self, clause: Iterable[int]) -> None:
+        self.clauses.append(list(clause))
+
+    def at_most_one(self, literals: list[int]) -> None:
+        for a, b in itertools.combinations(literals, 2):
+            self.add([-a, -b])
+
+    def exactly_one(self, literals: list[int]) -> None:
+        self.add(literals)
+        self.at_most_one(literals)
+
+    def exactly(self, k: int, literals: list[int]) -> None:
+        """Require exactly `k` true literals. Only meant for a handful of literals."""
+        for values in itertools.product((False, True), repeat=len(literals)):
+            if sum(values) != k:
+                self.add(-lit if value else lit for lit, value in zip(literals, values))
+
+    def is_satisfied_by(self, model: Iterable[int]) -> bool:
+        true = set(model)
+        return all(any(lit in true for lit in clause) for clause in self.clauses)
+
+    def decode(self, state: State, model: Iterable[int]) -> State:
+        """Return a copy of `state` with the moves chosen by `model` played."""
+        state = state.copy()
+        for lit in model:
+            if abs(lit) not in self._moves:
+                continue
+            move = self._moves[abs(lit)][0 if lit > 0 else 1]
+            if move is not None and not move.is_played(state):
+                move.play(state)
+        return state
+
+    def to_dimacs(self) -> str:
+        lines = [f"p cnf {self.num_vars} {len(self.clauses)}"]
+        lines += [" ".join(map(str, clause)) + " 0" for clause in self.clauses]
+        return "\n".join(lines) + "\n"
+
+
+class SatEngine:
+    """Solves a game through its `to_cnf()` encoding.
+
+    `backend` is "pysat" or "pycosat"; by default the first one installed is used.
+    """
+
+    def __init__(self, start_state: State, backend: str | None = None) -> None:
+        if backend is None:
+            if not BACKENDS:
+                raise ImportError("SatEngine needs python-sat or pycosat installed.")
+            backend = BACKENDS[0]
+        if backend not in BACKENDS:
+            raise ImportError(f"SAT backend {backend} is not installed.")
+        self.start_state = start_state
+        self.backend = backend
+        self.nodes_explored = 0  # the solver's decisions, where it reports them
+        self.encode_seconds = 0.0
+        self.solve_seconds = 0.0
+
+    def _models(self, cnf: CNF) -> Iterator[list[int]]:
+        if self.backend == "pysat":
+            with PySatSolver(name="glucose4", bootstrap_with=cnf.clauses) as solver:
+                for model in solver.enum_models():
+                    self.nodes_explored = solver.accum_stats().get("decisions", 0)
+                    yield model
+        else:
+            yield from pycosat.itersolve(cnf.clauses, vars=cnf.num_vars)
+
+    def solve(self) -> State:
+        start = time.perf_counter()
+        cnf = self.start_state.to_cnf()
+        self.encode_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        models = self._models(cnf)
+        model = next(models, None)
+        models.close()
+        self.solve_seconds = time.perf_counter() - start
+
+        if model is None:
+            raise Exception("No solution exists.")
+        solution = cnf.decode(self.start_state, model)
+        assert solution.is_solved(), "Returned solution is not actually solved."
+        return solution
+
+    def count_solutions(self, limit: int | None = None) -> int:
+        """Count the solutions, stopping early once `limit` are found."""
+        count = 0
+        models = self._models(self.start_state.to_cnf())
+        for _ in models:
+            count += 1
+            if count == limit:
+                break
+        models.close()
+        return count
@@ -0,0 +1,329 @@
+"""A long-running local solver service.
+
+Keeps a pool of pre-warmed worker processes so that a request doesn't pay for
+starting Python and importing the solver. Clients connect over a Unix socket (or TCP
+on localhost) and speak JSON lines, one request or response per line:
+
+    {"id": 1, "type": "sudoku", "grid": "3....8..9...", "max_nodes": 5000}
+    {"id": 2, "type": "lookair", "size": 6, "numbers": [[0, 0, 3], [1, 0, 3]]}
+    {"id": 3, "type": "killer", "cages": [[3, [[0, 0], [0, 1]]], [15, [[0, 2], ...]]]}
+    {"id": 4, "type": "fivecells", "size": 10, "numbers": [[0, 0, 3], [0, 1, 2]]}
+    {"id": 5, "type": "stats"}
+
+Responses carry the request's id and either `solved`, `solution` and `stats` or an
+`error`. Small requests of the same puzzle type that arrive within `batch_wait`
+seconds of each other are sent to a worker together: the batch size for a type is
+chosen so that a batch takes about `batch_target` seconds, based on how long its
+recent requests took (so slow puzzle types aren't batched at all). At most one batch
+per worker is in flight; beyond that requests wait in a bounded queue, and once it is
+full the service stops reading from the connections until it drains (backpressure).
+A request's `max_nodes` and `timeout` are capped by the service's limits, which also
+apply to requests that don't set them, so one hard puzzle can't hold a worker
+indefinitely. The time limit covers a whole batch.
+
+Usage: python service.py [--socket PATH | --port PORT] [--workers N]
+    [--max-nodes N] [--timeout SECONDS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from fivecells import FivecellsState
+from killer import KillerSudokuState
+from lookair import LookairState
+from main import GameEngine, State
+from sudoku import SudokuState
+
+PUZZLE_TYPES: dict[str, Callable[[dict[str, Any]], State]] = {
+    "sudoku": lambda request: SudokuState.from_string(request["grid"]),
+    "lookair": lambda request: LookairState(
+        size=request["size"],
+        numbers_and_pos={(row, col): n for row, col, n in request["numbers"]},
+    ),
+    "fivecells": lambda request: FivecellsState(
+        size=request["size"],
+        numbers_and_pos={(row, col): n for row, col, n in request["numbers"]},
+        blocked=[tuple(cell) for cell in request.get("blocked", ())],
+    ),
+    # The grid is optional for killer sudokus, which usually start empty.
+    "killer": lambda request: KillerSudokuState(
+        SudokuState.from_string(request.get("grid", "." * 81)).data,
+        cages=[(total, cells) for total, cells in request["cages"]],
+    ),
+}
+
+
+def solve_batch(
+    puzzle_type: str,
+    requests: list[dict[str, Any]],
+    max_nodes: int | None = None,
+    timeout: float | None = None,
+) -> list[dict]:
+    """Solve a batch of requests of the same type. Runs in a worker process.
+
+    `max_nodes` caps each request's node limit and `timeout` the seconds the whole
+    batch may take. Requests can ask for less but not for more.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    results = []
+    for request in requests:
+        try:
+            engine = GameEngine(PUZZLE_TYPES[puzzle_type](request), verbose=False)
+            time_left = None
+            if deadline is not None:
+                time_left = max(0.0, deadline - time.monotonic())
+            result = engine.solve(
+                max_nodes=_limit(request.get("max_nodes"), max_nodes),
+                timeout=_limit(request.get("timeout"), time_left),
+            )
+            results.append(
+                {
+                    "solved": result.is_solved(),
+                    "solution": result.data,
+                    "stats": engine.stats(),
+                }
+            )
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+def _limit(requested, limit):
+    if limit is None:
+        return requested
+    return limit if requested is None else min(requested, limit)
+
+
+def _warm_up() -> int:
+    time.sleep(0.1)  # long enough for each warm-up call to land on its own worker
+    return os.getpid()
+
+
+class SolverService:
+    def __init__(
+        self,
+        workers: int = os.cpu_count() or 1,
+        max_queue: int = 1000,
+        max_batch_size: int = 32,
+        batch_wait: float = 0.002,
+        batch_target: float = 0.02,
+        max_nodes: int | None = 1_000_000,
+        timeout: float | None = 10.0,
+    ) -> None:
+        self.workers = workers
+        self.max_nodes = max_nodes
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.batch_wait = batch_wait
+        self.batch_target = batch_target
+        self.solve_seconds: dict[str, float] = {}  # moving average per puzzle type
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.worker_slots = asyncio.Semaphore(workers)
+        self.in_flight = 0
+        self.completed = 0
+        self.latencies: deque[float] = deque(maxlen=10_000)
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.workers))
+        )
+        self.dispatcher = asyncio.create_task(self.dispatch())
+
+    async def close(self) -> None:
+        self.dispatcher.cancel()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        write_lock = asyncio.Lock()
+        replies = set()
+        try:
+            while line := await reader.readline():
+                received = time.monotonic()
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    await self.respond(writer, write_lock, {"error": str(e)})
+                    continue
+                if not isinstance(request, dict):
+                    error = {"error": "A request must be a JSON object."}
+                    await self.respond(writer, write_lock, error)
+                    continue
+                result = asyncio.get_running_loop().create_future()
+                puzzle_type = request.get("type")
+                if puzzle_type == "stats":
+                    result.set_result(self.stats())
+                elif (
+                    not isinstance(puzzle_type, str)
+                    or puzzle_type not in PUZZLE_TYPES
+                ):
+                    result.set_result({"error": "Unknown puzzle type."})
+                else:
+                    # Blocks while the queue is full, which stops us reading more.
+                    await self.queue.put((request, received, result))
+                reply = asyncio.create_task(
+                    self.reply(request, result, writer, write_lock)
+                )
+                replies.add(reply)
+                reply.add_done_callback(replies.discard)
+            await asyncio.gather(*replies)
+        except ConnectionError:
+            pass  # the client went away
+        finally:
+            writer.close()
+
+    async def reply(
+        self,
+        request: dict,
+        result: asyncio.Future,
+        writer: asyncio.StreamWriter,
+        write_lock: asyncio.Lock,
+    ) -> None:
+        await self.respond(
+            writer, write_lock, {"id": request.get("id"), **(await result)}
+        )
+
+    async def respond(
+        self, writer: asyncio.StreamWriter, write_lock: asyncio.Lock, response: dict
+    ) -> None:
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def dispatch(self) -> None:
+        pending: dict[str, list] = {}
+        while True:
+            item = await self.queue.get()
+            pending.setdefault(item[0]["type"], []).append(item)
+            # Give requests arriving right after this one a chance to join its batch.
+            deadline = time.monotonic() + self.batch_wait
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                pending.setdefault(item[0]["type"], []).append(item)
+
+            for puzzle_type, items in pending.items():
+                batch_size = self.batch_size(puzzle_type)
+                for i in range(0, len(items), batch_size):
+                    await self.worker_slots.acquire()
+                    self.in_flight += 1
+                    batch = items[i : i + batch_size]
+                    asyncio.create_task(self.run_batch(puzzle_type, batch))
+            pending.clear()
+
+    def batch_size(self, puzzle_type: str) -> int:
+        seconds = self.solve_seconds.get(puzzle_type)
+        if seconds is None:
+            return 1
+        return max(1, min(self.max_batch_size, int(self.batch_target / seconds)))
+
+    async def run_batch(self, puzzle_type: str, batch: list) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.pool,
+                solve_batch,
+                puzzle_type,
+                [item[0] for item in batch],
+                self.max_nodes,
+                self.timeout,
+            )
+        except Exception as e:
+            results = [{"error": f"{type(e).__name__}: {e}"}] * len(batch)
+        finally:
+            self.worker_slots.release()
+            self.in_flight -= 1
+        for (_, received, result), response in zip(batch, results):
+            self.latencies.append(time.monotonic() - received)
+            self.completed += 1
+            if "stats" in response:
+                seconds = response["stats"]["seconds"]
+                average = self.solve_seconds.get(puzzle_type, seconds)
+                self.solve_seconds[puzzle_type] = 0.8 * average + 0.2 * seconds
+            result.set_result(response)
+
+    def stats(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float | None:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(fraction * len(latencies)))
+            return round(latencies[index] * 1000, 2)
+
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "in_flight_batches": self.in_flight,
+            "completed": self.completed,
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+            "batch_sizes": {t: self.batch_size(t) for t in self.solve_seconds},
+        }
+
+
+async def serve(args: argparse.Namespace) -> None:
+    service = SolverService(
+        workers=args.workers,
+        max_queue=args.max_queue,
+        max_batch_size=args.max_batch_size,
+        batch_wait=args.batch_wait / 1000,
+        batch_target=args.batch_target / 1000,
+        max_nodes=args.max_nodes,
+        timeout=args.timeout,
+    )
+    await service.start()
+    if args.port is not None:
+        server = await asyncio.start_server(
+            service.handle_connection, "127.0.0.1", args.port
+        )
+    else:
+        server = await asyncio.start_unix_server(service.handle_connection, args.socket)
+    print(f"Serving on {args.socket if args.port is None else args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default="/tmp/puzzle_solver.sock")
+    parser.add_argument("--port", type=int, help="Listen on localhost instead.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-queue", type=int, default=1000)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--batch-wait", type=float, default=2, help="milliseconds")
+    parser.add_argument("--batch-target", type=float, default=20, help="milliseconds")
+    parser.add_argument(
+        "--max-nodes",
+        type=int,
+        default=1_000_000,
+        help="Node limit for requests that don't set max_nodes.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=10.0,
+        help="Time limit in seconds for requests that don't set timeout.",
+    )
+    args = parser.parse_args()
+    if args.port is None and os.path.exists(args.socket):
+        os.remove(args.socket)
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
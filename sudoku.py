@@ -1,22 +1,101 @@
+from functools import cache
+from math import isqrt
+
 from main import GameEngine, GridState, GridMove
+from sat import CNF
+from util import grid_data_to_str
+
+
+DIGITS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+@cache
+def _peers(box_size: int) -> dict[tuple[int, int], list[tuple[int, int]]]:
+    size = box_size * box_size
+    return {
+        (row, col): [
+            (r, c)
+            for r in range(size)
+            for c in range(size)
+            if (r, c) != (row, col)
+            and (
+                r == row
+                or c == col
+                or (r // box_size, c // box_size) == (row // box_size, col // box_size)
+            )
+        ]
+        for row in range(size)
+        for col in range(size)
+    }
+
+
+@cache
+def _peer_sets(box_size: int) -> dict[tuple[int, int], frozenset[tuple[int, int]]]:
+    return {cell: frozenset(peers) for cell, peers in _peers(box_size).items()}
 
 
 class SudokuState(GridState):
+    """A sudoku of any box size (3 for the usual 9x9 grid), inferred from the grid."""
+
     def __init__(self, starting_grid) -> None:
-        super().__init__(size=9, max_value=9, box_size=3, starting_state=starting_grid)
+        box_size = isqrt(len(starting_grid))
+        assert box_size > 1 and box_size**2 == len(starting_grid)
+        size = box_size**2
+        super().__init__(
+            size=size, max_value=size, box_size=box_size, starting_state=starting_grid
+        )
+        self._build_tables()
+
+    # Lookup tables that follow from the rest of the state. They make up most of a
+    # pickled state, so they are left out and rebuilt when it is unpickled.
+    TABLES = ("peers", "peer_sets")
+
+    def _build_tables(self) -> None:
+        self.peers = _peers(self._box_size)
+        self.peer_sets = _peer_sets(self._box_size)
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k not in self.TABLES}
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        self._build_tables()
+
+    @classmethod
+    def from_string(cls, grid: str) -> "SudokuState":
+        """Parse a grid written row by row, using '.' or '0' for empty cells and
+        1-9 then A-Z for values (e.g. 81 characters for a 9x9 sudoku).
+        """
+        size = isqrt(len(grid))
+        assert size**2 == len(grid) and isqrt(size) ** 2 == size, "Bad grid length."
+        values = [None if char in ".0" else DIGITS.index(char) + 1 for char in grid]
+        return cls([values[row * size : (row + 1) * size] for row in range(size)])
+
+    def to_string(self) -> str:
+        return "".join(
+            "." if value is None else DIGITS[value - 1]
+            for _, _, value in self.iter_cells()
+        )
+
+    def __str__(self) -> str:
+        if self.size <= 9:
+            return super().__str__()
+        data = [[v if v is None else DIGITS[v - 1] for v in row] for row in self.data]
+        return grid_data_to_str(data, self._box_size)
 
     def copy(self):
         return SudokuState([row[:] for row in self.data])
 
     def _generate_plausible_moves_for_cell(self, row: int, col: int) -> list[GridMove]:
-        options = [True] * 9
+        options = [True] * self.size
         for cell in self.row(row):
             if cell is not None:
                 options[cell - 1] = False
         for cell in self.column(col):
             if cell is not None:
                 options[cell - 1] = False
-        for cell in self.box(row // 3, col // 3):
+        box_size = self._box_size
+        for cell in self.box(row // box_size, col // box_size):
             if cell is not None:
                 options[cell - 1] = False
         return [
@@ -25,6 +104,80 @@ class SudokuState(GridState):
             if can_place
         ]
 
+    def generate_forced_moves(self, played: list[GridMove]) -> list[list[GridMove]]:
+        cells = dict.fromkeys(
+            peer
+            for move in played
+            for peer in self.peers[(move.row, move.col)]
+            if self.data[peer[0]][peer[1]] is None
+        )
+        forced_moves = []
+        for row, col in cells:
+            legal_moves = self._generate_plausible_moves_for_cell(row, col)
+            if not legal_moves:
+                return [legal_moves]  # dead end
+            if len(legal_moves) == 1:
+                forced_moves.append(legal_moves)
+        return forced_moves
+
+    def explain(self, move: GridMove) -> list[GridMove]:
+        return self._filled_peers(move.row, move.col)
+
+    def explain_dead_end(self) -> list[GridMove] | None:
+        for row, col, value in self.iter_cells():
+            if value is None and not self._generate_plausible_moves_for_cell(row, col):
+                return self._filled_peers(row, col)
+        return None
+
+    def order_moves(
+        self, moves: list[GridMove], legal_moves: list[list[GridMove]]
+    ) -> list[GridMove]:
+        """Least constraining value first: the digit that is still a candidate in the
+        fewest empty peers, counted from the candidates in `legal_moves`.
+        """
+        peers = self.peer_sets[(moves[0].row, moves[0].col)]
+        removed = dict.fromkeys((move.value for move in moves), 0)
+        for group in legal_moves:
+            if (group[0].row, group[0].col) not in peers:
+                continue
+            for move in group:
+                if move.value in removed:
+                    removed[move.value] += 1
+        return sorted(moves, key=lambda move: removed[move.value])
+
+    def to_cnf(self) -> CNF:
+        cnf = CNF()
+        n, b = self.size, self._box_size
+        values = range(1, n + 1)
+        x = {
+            (row, col, value): cnf.var(GridMove(row, col, value))
+            for row in range(n)
+            for col in range(n)
+            for value in values
+        }
+        units = [[(row, col) for col in range(n)] for row in range(n)]
+        units += [[(row, col) for row in range(n)] for col in range(n)]
+        units += [
+            [(b * br + r, b * bc + c) for r in range(b) for c in range(b)]
+            for br in range(b)
+            for bc in range(b)
+        ]
+        for row, col, value in self.iter_cells():
+            cnf.exactly_one([x[(row, col, v)] for v in values])
+            if value is not None:
+                cnf.add([x[(row, col, value)]])
+        for unit in units:
+            for v in values:
+                cnf.exactly_one([x[(row, col, v)] for row, col in unit])
+        return cnf
+
+    def _filled_peers(self, row: int, col: int) -> list[GridMove]:
+        return [
+            GridMove(r, c, self.data[r][c])
+            for r, c in self.peers[(row, col)]
+            if self.data[r][c] is not None
+        ]
+
 
 if __name__ == "__main__":
     sudoku_state = SudokuState(
@@ -1,7 +1,70 @@
-from main import GridState
+import itertools
+import pickle
+
+from lookair import LookairState
+from main import GameEngine, GridMove, GridState, Rule, RuleSchedule
+from sudoku import SudokuState
+from test_lookair import NUMBERS_AND_POS
+from test_sudoku import EXTREME
 import pytest
 
 
+class LatinSquareState(GridState):
+    """Every row and column holds each value once. Both the empty cells and the
+    values missing from each row are groups, so a move belongs to several groups."""
+
+    def __init__(self, size, starting_state=None):
+        super().__init__(size=size, max_value=size, starting_state=starting_state)
+
+    def copy(self):
+        copy_state = LatinSquareState(self.size, [row[:] for row in self.data])
+        copy_state.moves_played = self.moves_played
+        return copy_state
+
+    def _generate_plausible_moves_for_cell(self, row, col):
+        return [
+            GridMove(row, col, value)
+            for value in range(1, self.size + 1)
+            if value not in self.row(row) and value not in self.column(col)
+        ]
+
+    def generate_legal_moves(self):
+        groups = [
+            self._generate_plausible_moves_for_cell(row, col)
+            for row, col, value in self.iter_cells()
+            if value is None
+        ]
+        for row in range(self.size):
+            for value in range(1, self.size + 1):
+                if value in self.row(row):
+                    continue
+                groups.append(
+                    [
+                        GridMove(row, col, value)
+                        for col in range(self.size)
+                        if self.data[row][col] is None
+                        and value not in self.column(col)
+                    ]
+                )
+        return groups
+
+
+def count_latin_squares(size):
+    """Count by brute force, one row permutation at a time."""
+    rows = list(itertools.permutations(range(1, size + 1)))
+
+    def count(square):
+        if len(square) == size:
+            return 1
+        return sum(
+            count(square + [row])
+            for row in rows
+            if all(row[col] != other[col] for other in square for col in range(size))
+        )
+
+    return count([])
+
+
 @pytest.mark.parametrize(
     "box_size,expected_result",
     [
@@ -40,5 +103,59 @@ def test_grid_state_print(box_size, expected_result, ):
     assert str(grid_state) == expected_result
 
 
+def test_grid_moves_are_interned():
+    move = GridMove(1, 2, 3)
+    assert GridMove(1, 2, 3) is move
+    assert GridMove(1, 2, 4) is not move
+    assert pickle.loads(pickle.dumps(move)) is move
+    assert not hasattr(move, "__dict__")
+
+
+@pytest.mark.parametrize("max_nogoods", [None, 1000])
+@pytest.mark.parametrize("seed", [None, 0, 1])
+def test_each_solution_is_counted_once(max_nogoods, seed):
+    engine = GameEngine(
+        LatinSquareState(4), verbose=False, max_nogoods=max_nogoods, seed=seed
+    )
+    assert engine.count_solutions() == count_latin_squares(4) == 576
+
+
+
+# Node counts from before choose_next_explore skipped groups without filtering them.
+@pytest.mark.parametrize(
+    "make_state,counts",
+    [
+        (lambda: SudokuState.from_string(EXTREME), (307, 400, 317)),
+        (lambda: LookairState(6, NUMBERS_AND_POS), (110, 1123, 110)),
+    ],
+)
+def test_skipping_groups_keeps_the_same_branches(make_state, counts):
+    configs = [{}, {"seed": 1}, {"max_nogoods": 1000}]
+    for config, count in zip(configs, counts):
+        engine = GameEngine(make_state(), verbose=False, **config)
+        assert engine.solve().is_solved()
+        assert engine.nodes_explored == count
+
+def test_adaptive_rule_schedule():
+    move = GridMove(0, 0, 1)
+    rules = [
+        Rule("never", lambda state: None),
+        Rule("needs_never", lambda state: None, requires=("never",)),
+        Rule("always", lambda state: [[move]]),
+    ]
+    schedule = RuleSchedule(
+        rules, adaptive=True, reorder_every=10, min_calls=5, retry_every=1000
+    )
+    for _ in range(20):
+        assert schedule.run(None) == [[move]]
+    assert [rule.name for rule in schedule.order] == ["always", "never", "needs_never"]
+    # "never" is skipped once it has found nothing 5 times, and so is the rule that
+    # requires it, until "always" is moved first.
+    assert schedule.stats["never"].calls == 5
+    assert schedule.stats["needs_never"].calls == 5
+    assert schedule.stats["needs_never"].skipped == 4
+    assert schedule.stats["always"].forced == 20
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,38 @@
+import random
+
+from canonical import SolutionCache, canonicalize, random_variant
+from main import GameEngine
+from sudoku import SudokuState
+from test_sudoku import EXTREME
+
+
+def test_variants_share_canonical_form():
+    state = SudokuState.from_string(EXTREME)
+    key, transform = canonicalize(state)
+    assert SudokuState(transform.apply(state.data)).to_string().replace(".", "0") == key
+    assert transform.invert(transform.apply(state.data)) == state.data
+
+    rng = random.Random(0)
+    for _ in range(10):
+        assert canonicalize(random_variant(state, rng))[0] == key
+
+    other = SudokuState.from_string("." + EXTREME[1:])
+    assert canonicalize(other)[0] != key
+
+
+def test_solution_cache(tmp_path):
+    path = str(tmp_path / "solutions")
+    state = SudokuState.from_string(EXTREME)
+    cache = SolutionCache(path=path)
+    cache.solve(state)
+    cache.close()
+
+    cache = SolutionCache(max_size=1, path=path)
+    rng = random.Random(1)
+    for _ in range(3):
+        variant = random_variant(state, rng)
+        solution = cache.solve(variant)
+        expected = GameEngine(variant, verbose=False).solve()
+        assert solution.data == expected.data
+    assert (cache.hits, cache.misses) == (3, 0)
+    cache.close()
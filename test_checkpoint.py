@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from checkpoint import Checkpoint
+from lookair import LookairState
+from main import GameEngine
+from sudoku import SudokuState
+from test_sudoku import EXTREME
+
+
+def test_resume(tmp_path):
+    path = str(tmp_path / "search.ckpt")
+    expected = GameEngine(SudokuState.from_string(EXTREME), verbose=False).solve()
+
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    assert not engine.solve(max_nodes=50, checkpoint=Checkpoint(path)).is_solved()
+
+    # Simulate a crash in the middle of writing the last record.
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 2)
+
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    result = engine.solve(max_nodes=49, checkpoint=Checkpoint(path))
+    assert engine.nodes_explored == 49  # all replayed, nothing new explored
+    assert not result.is_solved()
+
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    assert engine.solve(checkpoint=Checkpoint(path)).data == expected.data
+
+
+def test_header_holds_only_the_puzzle(tmp_path):
+    path = str(tmp_path / "search.ckpt")
+    checkpoint = Checkpoint(path)
+    checkpoint.open(GameEngine(SudokuState.from_string(EXTREME), verbose=False))
+    checkpoint.close()
+    assert os.path.getsize(path) < 500
+
+
+def test_resume_with_restarts(tmp_path):
+    path = str(tmp_path / "search.ckpt")
+
+    def make_engine():
+        state = SudokuState.from_string(EXTREME)
+        return GameEngine(state, seed=1, restart_interval=20, verbose=False)
+
+    engine = make_engine()
+    engine.solve(max_nodes=100, checkpoint=Checkpoint(path))
+    restarts = engine.restarts
+
+    engine = make_engine()
+    engine.solve(max_nodes=100, checkpoint=Checkpoint(path))
+    assert engine.restarts == restarts
+
+    assert make_engine().solve(checkpoint=Checkpoint(path)).is_solved()
+
+    # A checkpoint of a different engine can't be resumed.
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    with pytest.raises(ValueError):
+        engine.solve(checkpoint=Checkpoint(path))
+
+
+def test_adaptive_rules_are_rejected(tmp_path):
+    state = LookairState(size=4, numbers_and_pos={(1, 1): 0})
+    engine = GameEngine(state, adaptive_rules=True, verbose=False)
+    with pytest.raises(ValueError):
+        engine.solve(checkpoint=Checkpoint(str(tmp_path / "search.ckpt")))
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from cube import conquer, cube_puzzle, cube_state, make_cubes, merge, solve_local
+from main import GameEngine
+from service import PUZZLE_TYPES
+from sudoku import SudokuState
+from test_sudoku import EXTREME
+
+PUZZLE = {"type": "sudoku", "grid": EXTREME}
+
+
+def test_cube_conquer_merge(tmp_path):
+    expected = GameEngine(SudokuState.from_string(EXTREME), verbose=False).solve()
+    paths = cube_puzzle(PUZZLE, str(tmp_path), count=8)
+    assert len(paths) >= 8
+    assert merge(str(tmp_path))["status"] == "incomplete"
+
+    for path in paths:
+        conquer(path)
+    result = merge(str(tmp_path))
+    assert result["status"] == "solved"
+    assert result["solution"] == expected.data
+
+
+def test_cubes_cover_every_solution():
+    # The last cell of this lookair can be shaded or not.
+    puzzle = {
+        "type": "lookair",
+        "size": 6,
+        "numbers": [
+            [0, 3, 1],
+            [0, 5, 1],
+            [2, 0, 2],
+            [2, 3, 3],
+            [2, 5, 1],
+            [3, 3, 2],
+            [3, 4, 1],
+            [4, 4, 3],
+        ],
+    }
+    prefixes = make_cubes(PUZZLE_TYPES["lookair"](puzzle), depth=3)
+    assert all(len(prefix) <= 3 for prefix in prefixes)
+    cubes = [
+        {"puzzle": puzzle, "prefix": [[m.row, m.col, m.value] for m in prefix]}
+        for prefix in prefixes
+    ]
+    total = sum(
+        GameEngine(cube_state(cube), verbose=False).count_solutions() for cube in cubes
+    )
+    assert total == 2
+
+
+def test_no_solution(tmp_path):
+    # Nothing fits in the top right corner.
+    puzzle = {"type": "sudoku", "grid": "12345678." + "........9" + "." * 63}
+    assert cube_puzzle(puzzle, str(tmp_path), depth=2) == []
+    assert merge(str(tmp_path))["status"] == "no_solution"
+
+
+def test_solve_local(tmp_path):
+    result = solve_local(PUZZLE, str(tmp_path), count=6, workers=2)
+    assert result["status"] == "solved"
+    assert SudokuState(result["solution"]).is_solved()
+
+
+def test_only_grid_moves_are_written(tmp_path):
+    puzzle = {"type": "fivecells", "size": 5, "numbers": [[0, 0, 3]]}
+    with pytest.raises(TypeError):
+        cube_puzzle(puzzle, str(tmp_path / "cubes"), count=4)
+    assert not os.path.exists(tmp_path / "cubes")
@@ -0,0 +1,46 @@
+import random
+
+from generate import _sudoku_solution, generate_lookair, generate_sudoku, is_unique
+from lookair import LookairState
+from service import PUZZLE_TYPES
+from sudoku import SudokuState
+
+
+def test_generate_sudoku():
+    puzzle = generate_sudoku(seed=1, box_size=2)
+    assert puzzle == generate_sudoku(seed=1, box_size=2)
+    state = SudokuState.from_string(puzzle["grid"])
+    assert state.size == 4
+    assert is_unique(state)
+    assert state.to_string() == puzzle["grid"]
+
+
+def test_sudoku_solutions_vary():
+    # A shuffled copy of one grid would always have the same number of 2x2
+    # squares holding a pair of digits swapped, e.g. 1 2 over 2 1.
+    def swapped_pairs(grid):
+        return sum(
+            grid[r][c] == grid[r2][c2] and grid[r][c2] == grid[r2][c]
+            for r in range(9)
+            for r2 in range(r + 1, 9)
+            for c in range(9)
+            for c2 in range(c + 1, 9)
+        )
+
+    counts = {
+        swapped_pairs(_sudoku_solution(random.Random(seed), 3)) for seed in range(5)
+    }
+    assert len(counts) > 1
+
+
+def test_generate_lookair():
+    puzzle = generate_lookair(seed=1, size=4, max_nodes=50)
+    assert puzzle["nodes"] <= 50
+    assert is_unique(PUZZLE_TYPES["lookair"](puzzle))
+
+
+def test_large_sudoku():
+    grid = "1" + "." * 255
+    state = SudokuState.from_string(grid)
+    assert state.size == 16 and state.to_string() == grid
+    assert len(state.generate_legal_moves()[0]) == 15
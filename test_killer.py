@@ -0,0 +1,107 @@
+import pickle
+
+import pytest
+
+from killer import KillerSudokuState, cage_combinations, cage_table
+from main import GameEngine, GridMove
+from sat import BACKENDS, SatEngine
+from service import PUZZLE_TYPES
+
+CAGES = (
+    (3, ((0, 0), (0, 1))),
+    (15, ((0, 2), (0, 3), (0, 4))),
+    (22, ((0, 5), (1, 4), (1, 5), (2, 4))),
+    (4, ((0, 6), (1, 6))),
+    (16, ((0, 7), (1, 7))),
+    (15, ((0, 8), (1, 8), (2, 8), (3, 8))),
+    (25, ((1, 0), (1, 1), (2, 0), (2, 1))),
+    (17, ((1, 2), (1, 3))),
+    (9, ((2, 2), (2, 3), (3, 3))),
+    (8, ((2, 5), (3, 5), (4, 5))),
+    (20, ((2, 6), (2, 7), (3, 6))),
+    (6, ((3, 0), (4, 0))),
+    (14, ((3, 1), (3, 2))),
+    (17, ((3, 4), (4, 4), (5, 4))),
+    (17, ((3, 7), (4, 6), (4, 7))),
+    (13, ((4, 1), (4, 2), (5, 1))),
+    (20, ((4, 3), (5, 3), (6, 3))),
+    (12, ((4, 8), (5, 8))),
+    (27, ((5, 0), (6, 0), (7, 0), (8, 0))),
+    (6, ((5, 2), (6, 1), (6, 2))),
+    (20, ((5, 5), (6, 5), (6, 6))),
+    (6, ((5, 6), (5, 7))),
+    (10, ((6, 4), (7, 3), (7, 4), (8, 3))),
+    (14, ((6, 7), (6, 8), (7, 7), (7, 8))),
+    (8, ((7, 1), (8, 1))),
+    (16, ((7, 2), (8, 2))),
+    (15, ((7, 5), (7, 6))),
+    (13, ((8, 4), (8, 5), (8, 6))),
+    (17, ((8, 7), (8, 8))),
+)
+SOLUTION = [
+    [2, 1, 5, 6, 4, 7, 3, 9, 8],
+    [3, 6, 8, 9, 5, 2, 1, 7, 4],
+    [7, 9, 4, 3, 8, 1, 6, 5, 2],
+    [5, 8, 6, 2, 7, 4, 9, 3, 1],
+    [1, 4, 2, 5, 9, 3, 8, 6, 7],
+    [9, 7, 3, 8, 1, 6, 4, 2, 5],
+    [8, 2, 1, 7, 3, 9, 5, 4, 6],
+    [6, 5, 9, 4, 2, 8, 7, 1, 3],
+    [4, 3, 7, 1, 6, 5, 2, 8, 9],
+]
+
+
+def empty_grid():
+    return [[None] * 9 for _ in range(9)]
+
+
+def test_cage_table():
+    assert cage_combinations(3, 2, 9) == [0b110]  # {1, 2}
+    assert len(cage_combinations(15, 3, 9)) == 8
+    table = cage_table(10, 3, 9)  # {1, 2, 7}, {1, 3, 6}, {1, 4, 5} or {2, 3, 5}
+    assert table[0] == sum(1 << d for d in range(1, 8))
+    assert table[1 << 7] == 0b110  # 7 leaves 1 and 2
+    assert table[1 << 1] == sum(1 << d for d in (2, 3, 4, 5, 6, 7))
+    assert (1 << 8) not in table  # no combination has an 8
+
+
+def test_cage_prunes_candidates():
+    state = KillerSudokuState(empty_grid(), cages=[(4, [(0, 0), (0, 1)])])
+    assert state._generate_plausible_moves_for_cell(0, 0) == [
+        GridMove(0, 0, 1),
+        GridMove(0, 0, 3),
+    ]
+    GridMove(0, 0, 3).play(state)
+    legal_moves = state.generate_forced_moves([GridMove(0, 0, 3)])
+    assert [GridMove(0, 1, 1)] in legal_moves
+
+
+def test_solve():
+    state = KillerSudokuState(empty_grid(), CAGES)
+    engine = GameEngine(state, verbose=False)
+    assert engine.count_solutions() == 1
+    assert GameEngine(state, verbose=False).solve().data == SOLUTION
+    assert state.copy().cages == state.cages
+
+
+def test_pickle_leaves_out_tables():
+    state = KillerSudokuState(empty_grid(), CAGES)
+    data = pickle.dumps(state)
+    assert b"cage_tables" not in data
+    copy = pickle.loads(data)
+    assert copy.cage_tables == state.cage_tables
+    assert copy.peer_sets == state.peer_sets
+    assert GameEngine(copy, verbose=False).solve().data == SOLUTION
+
+
+@pytest.mark.skipif(not BACKENDS, reason="needs python-sat or pycosat")
+def test_solve_with_sat():
+    state = KillerSudokuState(empty_grid(), CAGES)
+    assert SatEngine(state).solve().data == SOLUTION
+
+
+def test_service_request():
+    cages = [[total, [list(cell) for cell in cells]] for total, cells in CAGES]
+    request = {"type": "killer", "cages": cages}
+    state = PUZZLE_TYPES["killer"](request)
+    assert GameEngine(state, verbose=False).solve().data == SOLUTION
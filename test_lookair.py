@@ -0,0 +1,124 @@
+from lookair import LookairState
+from main import GameEngine, GridMove
+
+NUMBERS_AND_POS = {
+    (0, 0): 3,
+    (1, 0): 3,
+    (1, 3): 3,
+    (2, 5): 1,
+    (3, 1): 2,
+    (4, 1): 0,
+    (4, 3): 2,
+    (5, 1): 1,
+}
+SOLUTION = [
+    [1, 1, 2, 1, 2, 2],
+    [1, 1, 2, 2, 1, 2],
+    [2, 2, 1, 1, 2, 1],
+    [1, 2, 1, 1, 2, 2],
+    [2, 2, 2, 2, 1, 1],
+    [2, 2, 1, 2, 1, 1],
+]
+
+
+def test_solve():
+    result = GameEngine(LookairState(size=6, numbers_and_pos=NUMBERS_AND_POS)).solve()
+    assert result.data == SOLUTION
+
+
+def test_solve_with_random_move_order():
+    for seed in range(5):
+        state = LookairState(size=6, numbers_and_pos=NUMBERS_AND_POS)
+        assert GameEngine(state, seed=seed).solve().data == SOLUTION
+
+
+def test_solve_with_value_ordering():
+    state = LookairState(size=6, numbers_and_pos=NUMBERS_AND_POS)
+    engine = GameEngine(state, value_ordering=True, verbose=False)
+    assert engine.solve().data == SOLUTION
+
+
+def test_count_solutions_when_last_cell_is_free():
+    # The last cell (0, 1) can be shaded or not; both must be counted.
+    numbers = {
+        (0, 3): 1,
+        (0, 5): 1,
+        (2, 0): 2,
+        (2, 3): 3,
+        (2, 5): 1,
+        (3, 3): 2,
+        (3, 4): 1,
+        (4, 4): 3,
+    }
+    engine = GameEngine(LookairState(size=6, numbers_and_pos=numbers), verbose=False)
+    assert engine.count_solutions() == 2
+
+
+def test_probing_shrinks_the_tree():
+    state = LookairState(size=6, numbers_and_pos=NUMBERS_AND_POS)
+    plain = GameEngine(state, verbose=False)
+    plain.solve()
+    probing = GameEngine(state, probe_budget=1000, verbose=False)
+    assert probing.solve().data == SOLUTION
+    assert probing.prober.refutations > 0
+    assert probing.nodes_explored < plain.nodes_explored / 5
+
+
+def test_rule_stats():
+    state = LookairState(size=6, numbers_and_pos=NUMBERS_AND_POS)
+    engine = GameEngine(state, verbose=False)
+    assert engine.solve().data == SOLUTION
+    stats = engine.rule_stats()
+    assert list(stats) == ["fill_rect", "rect_to_square", "numbers"]
+    assert all(s["calls"] > 0 and s["forced"] > 0 for s in stats.values())
+
+    adaptive = GameEngine(state, adaptive_rules=True, verbose=False)
+    assert adaptive.solve().data == SOLUTION
+    order = list(adaptive.rule_stats())
+    assert order.index("fill_rect") < order.index("rect_to_square")
+
+
+def test_decompose_counts_the_same_solutions():
+    numbers = {(1, 3): 1, (3, 1): 0}
+    plain = GameEngine(LookairState(4, numbers), verbose=False)
+    expected = sorted(solution.data for solution in plain.solve_iter())
+    for max_nogoods in (None, 1000):
+        state = LookairState(4, numbers)
+        engine = GameEngine(
+            state, decompose=True, max_nogoods=max_nogoods, verbose=False
+        )
+        solutions = list(engine.solve_iter())
+        assert sorted(solution.data for solution in solutions) == expected
+        assert all(solution.is_legal_solution() for solution in solutions)
+        assert engine.stats()["splits"] > 0
+        assert engine.nodes_explored < plain.nodes_explored
+
+
+def test_rules_return_every_forced_cell():
+    state = LookairState(size=4, numbers_and_pos={(1, 1): 0})
+    cells = [(0, 1), (2, 1), (1, 0), (1, 2), (1, 1)]
+    assert state.find_forced_numbers() == [
+        [GridMove(r, c, state.UNSHADED)] for r, c in cells
+    ]
+
+    # An L of shaded cells has to be filled in to a 3x3 square.
+    for row, col in [(0, 0), (0, 1), (0, 2), (1, 0), (2, 0)]:
+        state.data[row][col] = state.SHADED
+    assert state.find_forced_fill_rect_moves() == [
+        [GridMove(r, c, state.SHADED)] for r, c in [(1, 1), (1, 2), (2, 1), (2, 2)]
+    ]
+
+    # A 1x2 rectangle in the top row can only grow downwards.
+    state = LookairState(size=4, numbers_and_pos={})
+    state.data[0][0] = state.data[0][1] = state.SHADED
+    assert state.find_forced_rect_to_square_moves() == [
+        [GridMove(1, 0, state.SHADED)],
+        [GridMove(1, 1, state.SHADED)],
+    ]
+
+
+def test_clues_forcing_a_cell_both_ways_are_a_dead_end():
+    # (1, 1) needs all of its cells shaded, but (0, 0) needs (0, 1) and (1, 0)
+    # unshaded.
+    state = LookairState(size=3, numbers_and_pos={(0, 0): 0, (1, 1): 5})
+    assert state.find_forced_numbers() == []
@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from fivecells import FivecellsState
+from main import GameEngine
+from regions import RegionState, _placements, orientations, polyominoes
+from service import PUZZLE_TYPES
+
+# A fivecells puzzle with a number in every cell, and its only solution.
+NUMBERS = ["33222", "23123", "22223", "33321", "22222"]
+REGIONS = ["ABBBB", "ACCCB", "AACCD", "EAEDD", "EEEDD"]
+
+
+def numbers_and_pos(rows):
+    return {
+        (row, col): int(number)
+        for row, line in enumerate(rows)
+        for col, number in enumerate(line)
+    }
+
+
+def count_tilings(size, shapes):
+    """Count the ways to tile the grid, by filling the first empty cell each time."""
+    by_cell = {}
+    for cells in _placements(size, tuple(shapes)):
+        by_cell.setdefault(min(cells), []).append(cells)
+    covered = set()
+
+    def count(cell):
+        if cell == size * size:
+            return 1
+        if divmod(cell, size) in covered:
+            return count(cell + 1)
+        total = 0
+        for cells in by_cell.get(divmod(cell, size), ()):
+            if covered.isdisjoint(cells):
+                covered.update(cells)
+                total += count(cell + 1)
+                covered.difference_update(cells)
+        return total
+
+    return count(0)
+
+
+def test_polyominoes():
+    assert [len(polyominoes(n)) for n in range(1, 7)] == [1, 1, 2, 5, 12, 35]
+    assert sum(len(orientations(shape)) for shape in polyominoes(5)) == 63
+
+
+@pytest.mark.parametrize("size,num_cells", [(4, 2), (3, 3), (4, 4)])
+def test_tilings_are_counted_once(size, num_cells):
+    expected = count_tilings(size, polyominoes(num_cells))
+    for max_nogoods in (None, 1000):
+        state = RegionState(size, polyominoes(num_cells))
+        engine = GameEngine(state, verbose=False, max_nogoods=max_nogoods)
+        assert engine.count_solutions() == expected
+
+
+def test_blocked_cells_and_walls():
+    domino = [((0, 0), (0, 1))]
+    # An odd number of cells left can't be tiled with dominoes.
+    state = RegionState(4, domino, blocked=[(3, 3)])
+    assert GameEngine(state, verbose=False).count_solutions() == 0
+    # Walls down the first column leave it two vertical dominoes, and there are 11
+    # domino tilings of the remaining 4x3 cells.
+    walls = [((row, 0), (row, 1)) for row in range(4)]
+    state = RegionState(4, domino, walls=walls)
+    assert GameEngine(state, verbose=False).count_solutions() == 11
+    solution = GameEngine(state, verbose=False).solve()
+    assert solution.data[0][0] == solution.data[1][0] != solution.data[0][1]
+
+
+def test_fivecells():
+    state = FivecellsState(5, numbers_and_pos(NUMBERS))
+    engine = GameEngine(state, verbose=False)
+    assert engine.count_solutions(limit=2) == 1
+    solution = GameEngine(state, verbose=False).solve()
+    assert str(solution).splitlines()[1:6] == [
+        f"║ {' '.join(numbers)} ║\t║ {' '.join(regions)} ║\t"
+        for numbers, regions in zip(NUMBERS, REGIONS)
+    ]
+
+
+def test_fivecells_service_request():
+    numbers = [[row, col, n] for (row, col), n in numbers_and_pos(NUMBERS).items()]
+    request = {"type": "fivecells", "size": 5, "numbers": numbers}
+    solution = GameEngine(PUZZLE_TYPES["fivecells"](request), verbose=False).solve()
+    assert solution.is_solved()
+
+
+def test_decompose_separate_areas():
+    # The blocked column leaves two 5x2 areas with 8 domino tilings each.
+    blocked = [(row, 2) for row in range(5)]
+    plain = GameEngine(RegionState(5, polyominoes(2), blocked), verbose=False)
+    assert plain.count_solutions() == 64
+    engine = GameEngine(
+        RegionState(5, polyominoes(2), blocked), decompose=True, verbose=False
+    )
+    solutions = {solution.key() for solution in engine.solve_iter()}
+    assert len(solutions) == 64
+    assert engine.stats()["splits"] == 1
+    assert engine.nodes_explored < plain.nodes_explored / 2
+
+
+def test_decompose_in_parallel():
+    blocked = [(row, 2) for row in range(5)]
+    with ProcessPoolExecutor(2) as executor:
+        state = RegionState(5, polyominoes(2), blocked)
+        engine = GameEngine(state, decompose=True, executor=executor, verbose=False)
+        assert engine.solve().is_solved()
+        assert engine.count_solutions() == 64
+
+
+def test_decompose_stops_at_the_node_limit():
+    blocked = [(row, 2) for row in range(5)]
+    state = RegionState(5, polyominoes(2), blocked)
+    engine = GameEngine(state, decompose=True, verbose=False)
+    assert len(list(engine.solve_iter(max_nodes=20))) < 64
+    assert engine.stop_reason == "max_nodes"
@@ -0,0 +1,48 @@
+import io
+import re
+
+from main import GameEngine
+from render import TerminalRenderer, diff_frames
+from sudoku import SudokuState
+from test_sudoku import EXTREME
+
+
+def apply(screen: list[str], changes: str) -> list[str]:
+    """Apply the escape sequences written by `diff_frames` to a list of lines."""
+    screen = screen[:]
+    for row, col, clear, text in re.findall(
+        r"\x1b\[(\d+);(\d+)H(\x1b\[K)?([^\x1b]*)", changes
+    ):
+        row, col = int(row) - 1, int(col) - 1
+        while len(screen) <= row:
+            screen.append("")
+        line = screen[row].ljust(col)
+        if clear:
+            line = line[:col]
+        screen[row] = line[:col] + text + line[col + len(text) :]
+    while screen and not screen[-1]:
+        screen.pop()
+    return screen
+
+
+def test_diff_frames():
+    old = ["║ 1 2 3 ║", "║ 4 5 6 ║", "║ 7 8 9 ║"]
+    new = ["║ 1 2 3 ║", "║ 4   6 ║ longer", "║ 7 8 9 ║"]
+    changes = diff_frames(old, new)
+    assert "1 2 3" not in changes
+    assert apply(old, changes) == new
+    assert apply(new, diff_frames(new, old)) == old
+    assert apply(new, diff_frames(new, new[:1])) == new[:1]
+
+
+def test_renderer(capsys):
+    stream = io.StringIO()
+    with TerminalRenderer(stream, fps=1000) as renderer:
+        engine = GameEngine(SudokuState.from_string(EXTREME), renderer=renderer)
+        engine.solve()
+    assert renderer.frames >= 1
+    assert renderer.lines == str(renderer.state).splitlines()
+    # The last state shown is the one the solution was found in, not its parent.
+    assert renderer.state.is_solved()
+    # The renderer replaces the engine's own printing.
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,42 @@
+import pytest
+
+from lookair import LookairState
+from main import GameEngine, GridMove
+from sat import BACKENDS, SatEngine
+from sudoku import SudokuState
+from test_lookair import NUMBERS_AND_POS, SOLUTION
+from test_sudoku import EXTREME
+
+
+def test_sudoku_encoding():
+    state = SudokuState.from_string(EXTREME)
+    solution = GameEngine(state, verbose=False).solve()
+    cnf = state.to_cnf()
+
+    def encode(grid):
+        # Every move already has a variable, so `var` only looks them up.
+        return [
+            cnf.var(GridMove(row, col, value)) * (1 if grid[row][col] == value else -1)
+            for row in range(9)
+            for col in range(9)
+            for value in range(1, 10)
+        ]
+
+    model = encode(solution.data)
+    assert cnf.is_satisfied_by(model)
+    assert cnf.decode(state, model).data == solution.data
+
+    solution.data[0][1], solution.data[0][2] = solution.data[0][2], solution.data[0][1]
+    assert not cnf.is_satisfied_by(encode(solution.data))
+    assert cnf.to_dimacs().startswith(f"p cnf 729 {len(cnf.clauses)}\n")
+
+
+@pytest.mark.skipif(not BACKENDS, reason="needs python-sat or pycosat")
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sat_engine(backend):
+    state = SudokuState.from_string(EXTREME)
+    expected = GameEngine(state, verbose=False).solve()
+    assert SatEngine(state, backend).solve().data == expected.data
+
+    state = LookairState(size=6, numbers_and_pos=NUMBERS_AND_POS)
+    assert SatEngine(state, backend).solve().data == SOLUTION
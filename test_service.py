@@ -0,0 +1,67 @@
+import asyncio
+import json
+import time
+
+from benchmark import SUDOKUS
+from loadgen import EASY_SUDOKU
+from service import SolverService, solve_batch
+
+
+def test_service(tmp_path):
+    socket_path = str(tmp_path / "solver.sock")
+
+    async def run():
+        service = SolverService(workers=1)
+        await service.start()
+        server = await asyncio.start_unix_server(service.handle_connection, socket_path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            requests = [
+                {"id": 1, "type": "sudoku", "grid": EASY_SUDOKU},
+                {"id": 2, "type": "sudoku", "grid": SUDOKUS["sudoku-extreme"], "max_nodes": 5},
+                {"id": 3, "type": "chess"},
+            ]
+            for request in requests:
+                writer.write(json.dumps(request).encode() + b"\n")
+            responses = [json.loads(await reader.readline()) for _ in requests]
+            # Valid JSON that isn't a request gets an error, and the connection
+            # stays open.
+            writer.write(b'[1, 2]\n{"id": 5, "type": ["sudoku"]}\n')
+            not_an_object = json.loads(await reader.readline())
+            responses.append(json.loads(await reader.readline()))
+            writer.write(b'{"id": 4, "type": "stats"}\n')
+            stats = json.loads(await reader.readline())
+            writer.close()
+            return {r["id"]: r for r in responses}, not_an_object, stats
+        finally:
+            server.close()
+            await service.close()
+
+    responses, not_an_object, stats = asyncio.run(run())
+    assert responses[1]["solved"]
+    assert responses[1]["solution"][0] == [3, 6, 9, 2, 1, 8, 7, 4, 5]
+    assert not responses[2]["solved"]
+    assert responses[2]["stats"]["stop_reason"] == "max_nodes"
+    assert "error" in responses[3]
+    assert "error" in not_an_object
+    assert "error" in responses[5]
+    assert stats["completed"] == 2
+    assert stats["queue_depth"] == 0
+
+
+def test_limits():
+    requests = [
+        {"grid": SUDOKUS["sudoku-extreme"]},
+        {"grid": SUDOKUS["sudoku-extreme"], "max_nodes": 100_000},
+        {"grid": SUDOKUS["sudoku-extreme"], "max_nodes": 2},
+    ]
+    results = solve_batch("sudoku", requests, max_nodes=5)
+    assert [result["stats"]["nodes_explored"] for result in results] == [5, 5, 2]
+    assert all(result["stats"]["stop_reason"] == "max_nodes" for result in results)
+
+    # The time limit is shared by the whole batch.
+    requests = [{"grid": SUDOKUS["sudoku-inkala"], "timeout": 1e9}] * 3
+    start = time.monotonic()
+    results = solve_batch("sudoku", requests, timeout=0.05)
+    assert time.monotonic() - start < 0.5
+    assert all(result["stats"]["stop_reason"] == "timeout" for result in results)
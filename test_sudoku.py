@@ -1,5 +1,10 @@
+import asyncio
+import threading
+
 from sudoku import SudokuState
-from main import GameEngine
+from main import GameEngine, GridMove, play_necessary_moves
+
+EXTREME = "3....8..97..5...2...........46......2..1...3...38..4..8....7.5......6.4.67...92.."
 
 
 def test_easy():
@@ -90,3 +95,130 @@ def test_extreme():
         [9, 5, 1, 2, 8, 6, 3, 4, 7],
         [6, 7, 4, 3, 5, 9, 2, 8, 1],
     ]
+
+
+def test_randomized_restarts():
+    engine = GameEngine(SudokuState.from_string(EXTREME), seed=1, restart_interval=20)
+    result = engine.solve()
+    assert engine.restarts > 0
+    assert result.data[0] == [3, 2, 5, 6, 4, 8, 7, 1, 9]
+
+    same_seed = GameEngine(SudokuState.from_string(EXTREME), seed=1, restart_interval=20)
+    same_seed.solve()
+    assert same_seed.nodes_explored == engine.nodes_explored
+
+
+def test_nogood_learning():
+    grid = "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3.."
+    for seed in range(3):
+        engine = GameEngine(
+            SudokuState.from_string(grid), seed=seed, restart_interval=50, max_nogoods=100
+        )
+        result = engine.solve()
+        assert len(engine.nogoods) > 0
+        assert result.data[0] == [1, 6, 2, 8, 5, 7, 4, 9, 3]
+
+
+def test_count_solutions():
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    assert engine.count_solutions(limit=2) == 1
+
+    ambiguous = "...6..719..953....41..72...5.6..3.9..87..4.............3.4.7........6....743..2.."
+    solutions = GameEngine(SudokuState.from_string(ambiguous), verbose=False).solve_iter()
+    first, second = next(solutions), next(solutions)
+    assert first.is_solved() and second.is_solved()
+    assert first.data != second.data
+    engine = GameEngine(SudokuState.from_string(ambiguous), verbose=False)
+    assert engine.count_solutions(limit=5) == 5
+
+
+def test_budgets():
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    partial = engine.solve(max_nodes=10)
+    assert not partial.is_solved()
+    assert engine.stop_reason == "max_nodes"
+    assert engine.stats()["nodes_explored"] == 10
+
+    cancel = threading.Event()
+    cancel.set()
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    assert not engine.solve(cancel=cancel).is_solved()
+    assert engine.stop_reason == "cancelled"
+
+    engine = GameEngine(SudokuState.from_string(EXTREME), verbose=False)
+    assert engine.solve(max_nodes=10_000, timeout=60).is_solved()
+    assert engine.stop_reason is None
+
+
+def test_solve_async():
+    async def solve_all():
+        engines = [
+            GameEngine(SudokuState.from_string(EXTREME), seed=seed, verbose=False)
+            for seed in range(3)
+        ]
+        return await asyncio.gather(*(engine.solve_async() for engine in engines))
+
+    for result in asyncio.run(solve_all()):
+        assert result.data[0] == [3, 2, 5, 6, 4, 8, 7, 1, 9]
+
+
+def test_least_constraining_value():
+    state = SudokuState.from_string(EXTREME)
+    legal_moves = state.generate_legal_moves()
+    for moves in legal_moves:
+        ordered = state.order_moves(moves, legal_moves)
+        assert sorted(ordered, key=repr) == sorted(moves, key=repr)
+        peers = state.peer_sets[(moves[0].row, moves[0].col)]
+        removed = [
+            sum(
+                GridMove(r, c, move.value) in group
+                for group in legal_moves
+                for r, c in [(group[0].row, group[0].col)]
+                if (r, c) in peers
+            )
+            for move in ordered
+        ]
+        assert removed == sorted(removed)
+
+    engine = GameEngine(state, value_ordering=True, verbose=False)
+    assert engine.solve().is_solved()
+
+
+def test_probing_with_nogoods_and_restarts():
+    engine = GameEngine(
+        SudokuState.from_string(EXTREME),
+        seed=0,
+        restart_interval=20,
+        max_nogoods=100,
+        probe_budget=8,
+        probe_depth=3,
+        verbose=False,
+    )
+    assert engine.count_solutions() == 1
+    assert engine.prober.probes > 0
+
+
+def test_every_forced_cell_is_returned():
+    state = SudokuState.from_string(".23434.22.43432.")
+    assert state.generate_legal_moves() == [
+        [GridMove(0, 0, 1)],
+        [GridMove(1, 2, 1)],
+        [GridMove(2, 1, 1)],
+        [GridMove(3, 3, 1)],
+    ]
+
+
+def test_forced_moves_are_rechecked_around_the_moves_played():
+    # (3, 3) is forced too, but it isn't a peer of (0, 1).
+    state = SudokuState.from_string(".23434122143432.")
+    assert state.generate_forced_moves([GridMove(0, 1, 2)]) == [[GridMove(0, 0, 1)]]
+
+
+def test_conflicting_forced_moves_are_a_dead_end():
+    # (0, 0) and (0, 1) can only be 1, so whichever is played second is illegal.
+    state, legal_moves, _ = play_necessary_moves(
+        SudokuState.from_string("..34.2..2.......")
+    )
+    assert legal_moves == []
+    assert not state.is_solved()
+    assert state.data[0][:2] in ([1, None], [None, 1])